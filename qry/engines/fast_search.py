@@ -12,9 +12,15 @@ import mmap
 import os
 import re
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # pragma: no cover - depends on optional runtime dependency
+    ahocorasick = None
+
 
 # ---------------------------------------------------------------------------
 # Algorithm implementations
@@ -126,6 +132,22 @@ class AhoCorasick:
         return results
 
 
+@lru_cache(maxsize=128)
+def get_automaton(words: Tuple[str, ...]):
+    """Build and cache a pyahocorasick automaton over words.
+
+    Returns None when pyahocorasick is not installed (or a word is empty,
+    which the automaton cannot represent).
+    """
+    if ahocorasick is None or not all(words):
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in words:
+        automaton.add_word(word, word)
+    automaton.make_automaton()
+    return automaton
+
+
 def mmap_regex_search(file_path: str, pattern: str) -> List[int]:
     """Memory-mapped file search using compiled regex – avoids full read."""
     compiled = re.compile(pattern.encode(), re.IGNORECASE)
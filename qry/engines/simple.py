@@ -1,11 +1,23 @@
 """Simple file search engine implementation."""
+import atexit
+import calendar
+import heapq
+import mimetypes
+import mmap
+import multiprocessing
 import os
+import queue
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import sys
+import threading
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
 from datetime import datetime
 from enum import IntEnum
-from pathlib import Path
-from typing import Callable, Dict, Generator, List, Optional, Tuple
+from itertools import islice
+from typing import Callable, Deque, Dict, FrozenSet, Generator, List, Optional, Tuple
 from functools import lru_cache
 
 try:
@@ -13,9 +25,14 @@ try:
 except ImportError:  # pragma: no cover - depends on optional runtime dependency
     magic = None
 
+try:
+    import hyperscan  # type: ignore
+except ImportError:  # pragma: no cover - depends on optional runtime dependency
+    hyperscan = None
+
 from ..core.models import SearchResult, SearchQuery
 from .base import SearchEngine
-from .fast_search import FastContentSearcher
+from .fast_search import get_automaton
 
 
 # Priority levels for directory search ordering
@@ -45,130 +62,505 @@ class Priority(IntEnum):
     EXCLUDED = 0      # .git/, .venv/, etc.
 
 
-# Priority patterns - regex patterns mapped to priorities
-PRIORITY_PATTERNS = [
+# Directory names mapped to priorities. Each path segment is looked up on its
+# own, and a directory takes the highest priority of any of its segments.
+PRIORITY_DIRS: Dict[str, Priority] = {
     # High priority - source code
-    (r'(^|/)src($|/)', Priority.SOURCE),
-    (r'(^|/)source($|/)', Priority.SOURCE),
-    (r'(^|/)lib($|/)', Priority.SOURCE),
-    (r'(^|/)code($|/)', Priority.SOURCE),
+    'src': Priority.SOURCE,
+    'source': Priority.SOURCE,
+    'lib': Priority.SOURCE,
+    'code': Priority.SOURCE,
     
     # Project-specific high priority
-    (r'(^|/)tests?($|/)', Priority.PROJECT),
-    (r'(^|/)test($|/)', Priority.PROJECT),
-    (r'(^|/)docs?($|/)', Priority.PROJECT),
-    (r'(^|/)scripts($|/)', Priority.PROJECT),
-    (r'(^|/)examples?($|/)', Priority.PROJECT),
+    'test': Priority.PROJECT,
+    'tests': Priority.PROJECT,
+    'doc': Priority.PROJECT,
+    'docs': Priority.PROJECT,
+    'scripts': Priority.PROJECT,
+    'example': Priority.PROJECT,
+    'examples': Priority.PROJECT,
     
     # Config files
-    (r'(^|/)\.config($|/)', Priority.CONFIG),
-    (r'(^|/)config($|/)', Priority.CONFIG),
-    (r'(^|/)settings($|/)', Priority.CONFIG),
+    '.config': Priority.CONFIG,
+    'config': Priority.CONFIG,
+    'settings': Priority.CONFIG,
     
     # Medium priority - main app directories
-    (r'(^|/)main($|/)', Priority.MAIN),
-    (r'(^|/)app($|/)', Priority.MAIN),
-    (r'(^|/)core($|/)', Priority.MAIN),
-    (r'(^|/)server($|/)', Priority.MAIN),
-    (r'(^|/)client($|/)', Priority.MAIN),
+    'main': Priority.MAIN,
+    'app': Priority.MAIN,
+    'core': Priority.MAIN,
+    'server': Priority.MAIN,
+    'client': Priority.MAIN,
     
     # Modules
-    (r'(^|/)modules?($|/)', Priority.MODULES),
-    (r'(^|/)components?($|/)', Priority.MODULES),
-    (r'(^|/)packages?($|/)', Priority.MODULES),
-    (r'(^|/)plugins?($|/)', Priority.MODULES),
-    (r'(^|/)extensions?($|/)', Priority.MODULES),
+    'module': Priority.MODULES,
+    'modules': Priority.MODULES,
+    'component': Priority.MODULES,
+    'components': Priority.MODULES,
+    'package': Priority.MODULES,
+    'packages': Priority.MODULES,
+    'plugin': Priority.MODULES,
+    'plugins': Priority.MODULES,
+    'extension': Priority.MODULES,
+    'extensions': Priority.MODULES,
     
     # Utils
-    (r'(^|/)utils($|/)', Priority.UTILS),
-    (r'(^|/)helpers($|/)', Priority.UTILS),
-    (r'(^|/)tools($|/)', Priority.UTILS),
-    (r'(^|/)lib($|/)', Priority.UTILS),
+    'utils': Priority.UTILS,
+    'helpers': Priority.UTILS,
+    'tools': Priority.UTILS,
     
     # Low priority - build directories
-    (r'(^|/)build($|/)', Priority.BUILD),
-    (r'(^|/)dist($|/)', Priority.BUILD),
-    (r'(^|/)out($|/)', Priority.BUILD),
-    (r'(^|/)target($|/)', Priority.BUILD),
-    (r'(^|/)release($|/)', Priority.BUILD),
-    (r'(^|/)debug($|/)', Priority.BUILD),
+    'build': Priority.BUILD,
+    'dist': Priority.BUILD,
+    'out': Priority.BUILD,
+    'target': Priority.BUILD,
+    'release': Priority.BUILD,
+    'debug': Priority.BUILD,
     
     # Cache directories (very low)
-    (r'(^|/)cache($|/)', Priority.CACHE),
-    (r'(^|/)__pycache__($|/)', Priority.CACHE),
-    (r'(^|/)node_modules($|/)', Priority.CACHE),
-    (r'(^|/).pytest_cache($|/)', Priority.CACHE),
-    (r'(^|/).tox($|/)', Priority.CACHE),
+    'cache': Priority.CACHE,
+    '__pycache__': Priority.CACHE,
+    'node_modules': Priority.CACHE,
+    '.pytest_cache': Priority.CACHE,
+    '.tox': Priority.CACHE,
     
     # Temp directories
-    (r'(^|/)temp($|/)', Priority.TEMP),
-    (r'(^|/)tmp($|/)', Priority.TEMP),
-    (r'(^|/).tmp($|/)', Priority.TEMP),
+    'temp': Priority.TEMP,
+    'tmp': Priority.TEMP,
+    '.tmp': Priority.TEMP,
     
     # Generated directories
-    (r'(^|/)generated($|/)', Priority.GENERATED),
-    (r'(^|/)compiled($|/)', Priority.GENERATED),
-    (r'(^|/)bin($|/)', Priority.GENERATED),
-    (r'(^|/)obj($|/)', Priority.GENERATED),
+    'generated': Priority.GENERATED,
+    'compiled': Priority.GENERATED,
+    'bin': Priority.GENERATED,
+    'obj': Priority.GENERATED,
     
     # Excluded (lowest priority - searched last)
-    (r'(^|/).git($|/)', Priority.EXCLUDED),
-    (r'(^|/).svn($|/)', Priority.EXCLUDED),
-    (r'(^|/).hg($|/)', Priority.EXCLUDED),
-    (r'(^|/).venv($|/)', Priority.EXCLUDED),
-    (r'(^|/)venv($|/)', Priority.EXCLUDED),
-    (r'(^|/)env($|/)', Priority.EXCLUDED),
-    (r'(^|/).idea($|/)', Priority.EXCLUDED),
-    (r'(^|/).vscode($|/)', Priority.EXCLUDED),
-]
-
-
-# Compile priority patterns once
-_priority_rx = [(re.compile(p), pri) for p, pri in PRIORITY_PATTERNS]
+    '.git': Priority.EXCLUDED,
+    '.svn': Priority.EXCLUDED,
+    '.hg': Priority.EXCLUDED,
+    '.venv': Priority.EXCLUDED,
+    'venv': Priority.EXCLUDED,
+    'env': Priority.EXCLUDED,
+    '.idea': Priority.EXCLUDED,
+    '.vscode': Priority.EXCLUDED,
+}
 
 
 def _get_directory_priority(dir_path: str) -> Priority:
     """Get priority for a directory based on its path.
     
     Args:
-        dir_path: The directory path to evaluate
+        dir_path: The directory path to evaluate ('/'-separated, relative)
         
     Returns:
         Priority level (higher = searched first)
     """
-    for rx, priority in _priority_rx:
-        if rx.search(dir_path):
-            return priority
-    return Priority.MAIN  # Default priority
+    best = None
+    for name in dir_path.split('/'):
+        priority = PRIORITY_DIRS.get(name)
+        if priority is not None and (best is None or priority > best):
+            best = priority
+    return Priority.MAIN if best is None else best  # Default priority
+
+
+def _descend_priority(matched: Optional[Priority], name: str) -> Optional[Priority]:
+    """Fold one more path segment into the best priority matched so far.
+    
+    Carrying this down a walk gives the same answer as calling
+    ``_get_directory_priority`` on the full relative path, without
+    rebuilding and re-splitting that path for every directory. ``None``
+    means no segment matched yet (the directory's priority is MAIN).
+    """
+    priority = PRIORITY_DIRS.get(name)
+    if priority is None or (matched is not None and matched >= priority):
+        return matched
+    return priority
 
 
 # Callback type for priority progress
 PriorityCallback = Optional[Callable[[str, int, int, List[str]], None]]
 
 
-# Cache for file stat results - avoids repeated filesystem calls
-@lru_cache(maxsize=10000)
-def _cached_stat(file_path: str) -> Optional[os.stat_result]:
-    """Cached version of os.stat to avoid repeated filesystem calls."""
+@lru_cache(maxsize=512)
+def _get_cached_regex(pattern: str, flags: int = re.IGNORECASE) -> re.Pattern:
+    """Get or create a cached compiled regex pattern (bounded LRU).
+    
+    Patterns that fail to compile are treated as literal text.
+    """
     try:
-        return os.stat(file_path)
-    except OSError:
+        return re.compile(pattern, flags)
+    except re.error:
+        return re.compile(re.escape(pattern), flags)
+
+
+@lru_cache(maxsize=512)
+def _get_cached_bytes_regex(pattern: str, flags: int = re.IGNORECASE) -> Optional[re.Pattern]:
+    """Bytes counterpart of ``_get_cached_regex`` for scanning raw file buffers.
+    
+    Returns None for non-ASCII patterns: bytes patterns only fold ASCII case,
+    so those have to be matched against decoded text instead. Also None for
+    patterns that only compile as str (``\\U...``, ``\\N{...}``) or not at
+    all; the text path handles both, treating invalid ones as literal text.
+    """
+    if not pattern.isascii():
+        return None
+    try:
+        return re.compile(pattern.encode('ascii'), flags)
+    except re.error:
         return None
 
 
-# Regex pattern cache
-_regex_cache: Dict[str, re.Pattern] = {}
+# Letter escapes that Python's re and Hyperscan's PCRE syntax read the same
+# way; any other letter or digit escape (\Z, \A, \N, \v, back-references)
+# is left to re
+_HS_SAFE_ESCAPES = frozenset(b'dDwWsSbBtnrf')
+_HS_REPEAT = re.compile(rb'\{\d+(?:,\d*)?\}')
 
 
-def _get_cached_regex(pattern: str, flags: int = re.IGNORECASE) -> re.Pattern:
-    """Get or create a cached compiled regex pattern."""
-    cache_key = (pattern, flags)
-    if cache_key not in _regex_cache:
-        try:
-            _regex_cache[cache_key] = re.compile(pattern, flags)
-        except re.error:
-            _regex_cache[cache_key] = re.compile(re.escape(pattern), flags)
-    return _regex_cache[cache_key]
+def _hyperscan_compatible(pattern: bytes) -> bool:
+    """Return True if Hyperscan reads a regex exactly as Python's ``re`` does.
+    
+    Deliberately conservative: literals, escaped punctuation, the escapes in
+    ``_HS_SAFE_ESCAPES``, plain character classes, ``* + ?`` and ``{m}``,
+    ``{m,}``, ``{m,n}`` repeats (lazy or greedy), ``(...)``/``(?:...)``
+    groups, ``|``, ``^``, ``$`` and ``.`` pass. Everything else - POSIX
+    classes, ``{,n}``, possessive repeats, other ``(?`` constructs, other
+    escapes - is scanned with ``re`` so results never depend on whether
+    hyperscan is installed.
+    """
+    def safe_escape(k: int) -> bool:
+        nxt = pattern[k + 1:k + 2]
+        return bool(nxt) and (not nxt.isalnum() or nxt[0] in _HS_SAFE_ESCAPES)
+    
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i:i + 1]
+        repeat = False
+        if c == b'\\':
+            if not safe_escape(i):
+                return False
+            i += 2
+            continue
+        if c == b'[':
+            i += 1
+            if pattern[i:i + 1] == b'^':
+                i += 1
+            if pattern[i:i + 1] == b']':
+                i += 1
+            while i < n and pattern[i:i + 1] != b']':
+                if pattern[i:i + 1] == b'[':
+                    return False  # POSIX class or nested set
+                if pattern[i:i + 1] == b'\\':
+                    if not safe_escape(i):
+                        return False
+                    i += 2
+                else:
+                    i += 1
+            if i >= n:
+                return False
+            i += 1
+            continue
+        if c == b'(':
+            if pattern[i + 1:i + 2] == b'?' and pattern[i + 2:i + 3] != b':':
+                return False
+            i += 3 if pattern[i + 1:i + 2] == b'?' else 1
+            continue
+        if c == b'{':
+            m = _HS_REPEAT.match(pattern, i)
+            if m is None:
+                return False
+            i = m.end()
+            repeat = True
+        elif c in (b'*', b'+', b'?'):
+            i += 1
+            repeat = True
+        else:
+            i += 1
+        if repeat and pattern[i:i + 1] == b'+':
+            return False  # Possessive repeat
+    return True
+
+
+@lru_cache(maxsize=128)
+def _get_hyperscan_db(pattern: bytes):
+    """Compile a bytes regex into a Hyperscan block-mode database.
+    
+    Returns None when hyperscan is not installed, the pattern is outside
+    the syntax both engines read alike (``_hyperscan_compatible``) or uses
+    features hyperscan does not support (patterns that match the empty
+    string); callers then fall back to ``re``.
+    """
+    if hyperscan is None or not _hyperscan_compatible(pattern):
+        return None
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    try:
+        db.compile(
+            expressions=[pattern],
+            flags=hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_MULTILINE | hyperscan.HS_FLAG_SINGLEMATCH,
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+
+@lru_cache(maxsize=128)
+def _get_hyperscan_literal_db(needles: Tuple[bytes, ...]):
+    """Compile lowercased literal needles into one caseless Hyperscan database.
+    
+    Every byte is written as a ``\\xHH`` escape so needles need no regex
+    quoting and may contain NUL. Returns None when hyperscan is unavailable.
+    """
+    if hyperscan is None:
+        return None
+    expressions = [b''.join(b'\\x%02x' % c for c in needle) for needle in needles]
+    db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+    try:
+        db.compile(
+            expressions=expressions,
+            ids=list(range(len(expressions))),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(expressions),
+        )
+    except hyperscan.error:
+        return None
+    return db
+
+
+def _stop_on_match(*_args) -> bool:
+    """Hyperscan match handler: returning True terminates the scan."""
+    return True
+
+
+def _hyperscan_match(db, data) -> bool:
+    """Return True if a Hyperscan database matches anywhere in data."""
+    try:
+        # A fresh scratch per scan (a few microseconds) keeps worker threads apart
+        db.scan(data, match_event_handler=_stop_on_match, scratch=hyperscan.Scratch(db))
+    except hyperscan.ScanTerminated:
+        return True
+    return False
+
+
+def _split_patterns(query: SearchQuery) -> Tuple[str, ...]:
+    """Split the query text into match patterns.
+    
+    Returns the raw pattern for regex queries, otherwise the lowercased
+    terms of an ``a or b`` query (or the whole lowercased text).
+    """
+    if query.use_regex:
+        return (query.query_text,)
+    query_lower = query.query_text.lower()
+    if " or " in query_lower:
+        return tuple(t.strip() for t in query_lower.split(" or ") if t.strip())
+    return (query_lower,)
+
+
+# Number of files handed to a worker thread per task in parallel search
+_STAT_BATCH_SIZE = 64
+
+
+# OR-queries with at least this many terms are matched with one compiled
+# alternation instead of a Python-level any() over the terms
+_OR_REGEX_MIN_TERMS = 4
+
+# Block size for literal content scans; matches spanning two blocks are
+# caught by carrying the previous block's tail over
+_CONTENT_BLOCK_SIZE = 64 * 1024
+
+# Files at least this large are content-scanned in a worker process when
+# threads would otherwise serialize on the GIL (see _search_in_content)
+_CONTENT_PROCESS_MIN_SIZE = 8 * 1024 * 1024
+
+# Worker processes shared by every engine in this process (the API builds a
+# fresh engine per request), created on first use; they scan large files
+# and search the roots of multi-root searches
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared worker process pool, creating it on first use.
+    
+    Workers are started from a forkserver (spawn where that is unavailable)
+    rather than forked from this process, which may have live threads.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=context)
+        return _process_pool
+
+
+def shutdown_process_pool(wait: bool = True) -> None:
+    """Shut down the shared worker process pool, if it was started.
+    
+    Tasks that have not started are cancelled. Runs automatically at exit
+    without waiting; a later search starts a new pool.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is None:
+        return
+    if sys.version_info >= (3, 9):
+        pool.shutdown(wait=wait, cancel_futures=True)
+    else:  # pragma: no cover - cancel_futures is new in 3.9
+        pool.shutdown(wait=wait)
+
+
+atexit.register(shutdown_process_pool, wait=False)
+
+
+@lru_cache(maxsize=256)
+def _get_content_needles(terms: Tuple[str, ...]) -> Tuple[bytes, ...]:
+    """Encode lowercased query terms once for matching raw file bytes."""
+    return tuple(t.encode('utf-8', 'ignore') for t in terms)
+
+
+@lru_cache(maxsize=256)
+def _get_terms_regex(terms: Tuple[str, ...]) -> re.Pattern:
+    """Compile literal OR terms into a single case-insensitive alternation."""
+    return re.compile('|'.join(map(re.escape, terms)), re.IGNORECASE)
+
+
+# Suffix -> MIME type mappings for common source/config files that the
+# platform mimetypes tables often miss (or map to something unrelated)
+_EXTRA_MIME_TYPES = {
+    '.yaml': 'application/yaml',
+    '.yml': 'application/yaml',
+    '.toml': 'application/toml',
+    '.ts': 'application/typescript',
+    '.tsx': 'text/tsx',
+    '.jsx': 'text/jsx',
+    '.rs': 'text/x-rust',
+    '.go': 'text/x-go',
+    '.log': 'text/plain',
+    '.ini': 'text/plain',
+    '.cfg': 'text/plain',
+}
+
+_mime_by_suffix: Optional[Dict[str, str]] = None
+
+
+def _get_mime_table() -> Dict[str, str]:
+    """Return the suffix -> MIME type table, loading it on first use."""
+    global _mime_by_suffix
+    if _mime_by_suffix is None:
+        mimetypes.init()
+        table = dict(mimetypes.types_map)
+        table.update(_EXTRA_MIME_TYPES)
+        _mime_by_suffix = table
+    return _mime_by_suffix
+
+
+# Whole-name date formats accepted for directory names (see _parse_dir_date)
+_DIR_DATE_RX = re.compile(
+    r'(?P<y>\d{4})(?:(?P<sep>[-_])(?P<m>1[0-2]|0[1-9]|[1-9])(?P=sep)(?P<d>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])'
+    # Unseparated %Y%m%d, then %Y%m (month/day alternatives as in strptime)
+    r'|(?P<m2>1[0-2]|0[1-9]|[1-9])(?P<d2>3[01]|[12]\d|0[1-9]|[1-9]| [1-9])'
+    r'|(?P<m3>1[0-2]|0[1-9]|[1-9]))?'
+    r'|(?P<a>\d{1,2})-(?P<b>\d{1,2})-(?P<y3>\d{4})'
+    r'|(?P<mon>[A-Za-z]+)_(?P<y4>\d{4})'
+)
+# Fallback: a date-like run anywhere in the name
+_DIR_DATE_SEARCH_RX = re.compile(r'(\d{4})[-_]?(\d{2})?[-_]?(\d{2})?')
+_MONTH_NAMES = {
+    name.lower(): i
+    for names in (calendar.month_name, calendar.month_abbr)
+    for i, name in enumerate(names) if name
+}
+
+
+@dataclass
+class _CompiledQuery:
+    """Query-derived state that stays the same for a whole search.
+    
+    Built once per search by ``_compile_query`` so the per-file pipeline
+    reads plain attributes instead of re-lowering and re-splitting the query
+    text, looking up attributes with defaults and scanning lists per file.
+    """
+    mode: str
+    use_regex: bool
+    patterns: Tuple[str, ...]
+    # Filename match in _prefilter_name, content match in _matches_query
+    match_filename: bool
+    match_content: bool
+    needles: Tuple[bytes, ...]
+    # Wanted suffixes with their dot (".py"), as returned by _file_suffix
+    file_suffixes: FrozenSet[str]
+    content_types: FrozenSet[str]
+    min_size: Optional[int]
+    max_size: Optional[int]
+    # The query's date range, for pruning directories named after dates
+    date_range: Optional[Tuple[datetime, datetime]]
+    # The same range as POSIX timestamps, compared against st_mtime
+    date_bounds: Optional[Tuple[float, float]]
+
+
+def _compile_query(query: SearchQuery) -> _CompiledQuery:
+    """Precompute everything the per-file checks need from a query."""
+    mode = getattr(query, 'search_mode', 'filename')
+    patterns = _split_patterns(query)
+    in_content = bool(query.query_text) and mode in ('content', 'both')
+    date_range = getattr(query, 'date_range', None)
+    return _CompiledQuery(
+        mode=mode,
+        use_regex=query.use_regex,
+        patterns=patterns,
+        match_filename=bool(query.query_text) and not in_content,
+        match_content=in_content,
+        needles=_get_content_needles(patterns) if in_content and not query.use_regex else (),
+        file_suffixes=frozenset('.' + t for t in query.file_types or ()),
+        content_types=frozenset(getattr(query, 'content_types', None) or ()),
+        min_size=query.min_size,
+        max_size=query.max_size,
+        date_range=date_range,
+        date_bounds=(
+            (date_range[0].timestamp(), date_range[1].timestamp()) if date_range else None
+        ),
+    )
+
+
+def _entry_inode(entry: os.DirEntry) -> int:
+    """Sort key for DirEntry objects by inode number."""
+    try:
+        return entry.inode()
+    except OSError:
+        return 0
+
+
+def _file_suffix(file_path: str) -> str:
+    """Return the lowercased suffix of a path (same rules as ``PurePath.suffix``).
+
+    Avoids building a Path object for every file on the hot path.
+    """
+    start = file_path.rfind(os.sep)
+    if os.altsep:
+        start = max(start, file_path.rfind(os.altsep))
+    dot = file_path.rfind('.')
+    # A leading dot (".bashrc") or a trailing one ("name.") is not a suffix
+    if dot <= start + 1 or dot == len(file_path) - 1:
+        return ''
+    return file_path[dot:].lower()
+
+
+# Where os.scandir accepts a directory fd, its entries are stat'ed with
+# fstatat() relative to that fd, so the kernel resolves only the final name
+# instead of walking every component of the full path again
+_SCANDIR_FD = os.scandir in os.supports_fd
+_DIR_OPEN_FLAGS = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0)
+
+
+def _open_dir(dir_path: str) -> Optional[int]:
+    """Open a directory for fd-relative scanning, or return None to scan by path."""
+    if not _SCANDIR_FD:
+        return None
+    try:
+        return os.open(dir_path, _DIR_OPEN_FLAGS)
+    except OSError:
+        return None
 
 
 class SimpleSearchEngine(SearchEngine):
@@ -180,96 +572,248 @@ class SimpleSearchEngine(SearchEngine):
         use_cache: bool = True,
         priority_mode: bool = False,
         priority_callback: PriorityCallback = None,
-        incremental_timeout: float = 1.0
+        incremental_timeout: float = 1.0,
+        inode_order: bool = True,
+        use_processes: bool = False
     ):
         """Initialize the simple search engine.
         
         Args:
             max_workers: Maximum number of worker threads for parallel processing
-            use_cache: Whether to use caching for file metadata
+            use_cache: Ignored, kept for backwards compatibility; stat results
+                        come from the directory entries of the current walk
             priority_mode: If True, search directories by priority (high to low)
             priority_callback: Callback function(priority_name, current, total, results) 
-                            called when switching to new priority level
+                            called after each run of same-priority directories
+                            (see ``search`` for the exact contract)
             incremental_timeout: Seconds to wait before showing progress (default: 1.0)
+            inode_order: Process directory entries in inode order to reduce disk
+                        seeks (disable on network filesystems)
+            use_processes: Use worker processes for the roots of multi-root
+                        searches and for content scans of large files in
+                        parallel searches (see ``_search_roots_in_processes``
+                        and ``_search_in_content``). The workers re-import the
+                        caller's ``__main__``, so scripts need an
+                        ``if __name__ == "__main__"`` guard
         """
         self.max_workers = max_workers or min(8, (os.cpu_count() or 4))
-        self.use_cache = use_cache
         self.priority_mode = priority_mode
         self.priority_callback = priority_callback
         self.incremental_timeout = incremental_timeout
+        self.inode_order = inode_order
+        self.use_processes = use_processes
+        # libmagic is only consulted for queries that filter on content_types
         self.mime = magic.Magic(mime=True) if magic else None
-        self._fast_searcher = FastContentSearcher()
-        # Date range for early directory pruning
-        self._date_range: Optional[Tuple[datetime, datetime]] = None
+        self._mime_table = _get_mime_table()
     
     def search(self, query: SearchQuery, search_paths: List[str]) -> List[SearchResult]:
-        """Search for files matching the query. Returns full list."""
+        """Search for files matching the query. Returns full list.
+        
+        In priority mode directories are searched as they are discovered,
+        highest priority first among those found so far: the files of each
+        search root come first, and a directory found later can outrank one
+        already searched, so results are not globally sorted by priority.
+        
+        ``priority_callback(name, current, total, results)`` fires after every
+        run of consecutively searched directories sharing a priority, with
+        that run's result paths; a name can therefore repeat. ``current``
+        counts runs from 1. ``total`` is an estimate (runs so far plus the
+        priorities still queued) that may grow as the walk finds more
+        directories; on the last call it equals ``current``.
+        """
         return list(self.search_iter(query, search_paths))
 
     def search_iter(self, query: SearchQuery, search_paths: List[str]) -> Generator[SearchResult, None, None]:
-        """Yield matching SearchResult objects one at a time (supports Ctrl+C)."""
+        """Yield matching SearchResult objects one at a time (supports Ctrl+C).
+        
+        All modes share one traversal (``_walk_dirs``) and one per-file
+        pipeline (``_process_file`` then ``_matches_query``); they differ only
+        in the order directories are visited and how the work is scheduled.
+        """
         # Use priority-based search if enabled
         if self.priority_mode:
             yield from self._search_by_priority(query, search_paths)
             return
         
-        exclude = set(getattr(query, 'exclude_dirs', []))
+        exclude = frozenset(getattr(query, 'exclude_dirs', None) or ())
         count = 0
         
-        # Store date range for early directory pruning
-        self._date_range = getattr(query, 'date_range', None)
+        compiled = _compile_query(query)
         
         # If we have date range and can use parallel processing, use it
-        if self._date_range and self.max_workers > 1:
+        if compiled.date_range and self.max_workers > 1:
             # Use parallel processing for date-filtered searches
-            yield from self._search_parallel(query, search_paths, exclude, count)
+            yield from self._search_parallel(query, search_paths, exclude, count, compiled)
             return
         
+        for file_path, entry in self._walk_entries(search_paths, exclude, query.max_depth, compiled.date_range):
+            result = self._process_file(file_path, compiled, entry)
+            if result and self._matches_query(result, compiled):
+                yield result
+                count += 1
+                if count >= query.max_results:
+                    return
+    
+    @staticmethod
+    def _split_roots(search_paths: List[str]) -> Tuple[List[str], List[str]]:
+        """Split search paths into (files, directories), dropping missing paths."""
+        files: List[str] = []
+        dirs: List[str] = []
         for path in search_paths:
-            if not os.path.exists(path):
-                continue
-                
-            abs_search_path = os.path.abspath(path)
-            
             if os.path.isfile(path):
-                result = self._process_file(path, query)
-                if result and self._matches_query(result, query):
-                    yield result
-                    count += 1
-                    if count >= query.max_results:
-                        return
-            else:
-                for root, dirs, files in os.walk(path):
-                    # Prune excluded directories in-place
-                    dirs[:] = [d for d in dirs if d not in exclude]
-                    
-                    # Early date-based directory pruning
-                    if self._date_range:
-                        dirs[:] = self._filter_dirs_by_date(root, dirs, self._date_range)
+                files.append(path)
+            elif os.path.exists(path):
+                dirs.append(path)
+        return files, dirs
+    
+    def _scan_dir(
+        self,
+        dir_path: str,
+        dir_fd: Optional[int] = None
+    ) -> Tuple[List[os.DirEntry], List[os.DirEntry]]:
+        """List a directory once with os.scandir, split into (files, subdirs).
 
-                    # Check depth if max_depth is specified
-                    abs_root = os.path.abspath(root)
-                    rel_root = os.path.relpath(abs_root, abs_search_path)
-                    
-                    if rel_root == '.':
-                        depth = 0
-                    else:
-                        depth = len([p for p in rel_root.split(os.sep) if p and p != '.'])
-                        
-                    if query.max_depth is not None:
-                        if depth >= query.max_depth:
-                            dirs[:] = []
-                            if depth > query.max_depth:
-                                continue
-                                
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        result = self._process_file(file_path, query)
-                        if result and self._matches_query(result, query):
-                            yield result
-                            count += 1
-                            if count >= query.max_results:
-                                return
+        DirEntry caches the d_type returned by the kernel, so classifying
+        entries costs no extra stat calls. Like ``os.walk`` (followlinks=False),
+        symlinks to directories are neither descended into nor reported as files.
+        With ``inode_order`` enabled entries are sorted by inode number (read
+        from the dirent, no syscall) so on-disk metadata is visited in order.
+        
+        If ``dir_fd`` is given the directory is listed through it: entry
+        ``path`` is then just the name, and the fd must stay open for as long
+        as the entries may be stat'ed.
+        """
+        files: List[os.DirEntry] = []
+        subdirs: List[os.DirEntry] = []
+        try:
+            with os.scandir(dir_path if dir_fd is None else dir_fd) as it:
+                entries = list(it)
+        except OSError:
+            return files, subdirs
+        
+        if self.inode_order:
+            entries.sort(key=_entry_inode)
+        
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        subdirs.append(entry)
+                    continue
+            except OSError:
+                pass
+            files.append(entry)
+        return files, subdirs
+    
+    def _walk_dirs(
+        self,
+        roots: List[str],
+        exclude: frozenset,
+        max_depth: Optional[int],
+        date_range: Optional[Tuple[datetime, datetime]] = None,
+        by_priority: bool = False,
+        pending: Optional[Dict[Priority, int]] = None
+    ) -> Generator[Tuple[str, Priority, int, List[os.DirEntry]], None, None]:
+        """Walk directory trees top-down, yielding (dir_path, priority, depth, file_entries).
+
+        This is the traversal every search mode is built on. It uses an
+        explicit frontier instead of ``os.walk`` so every directory is listed
+        exactly once. Depth and the directory priority (from the path
+        segments below the search root) are carried with each directory and
+        updated per level rather than recomputed from the path. Excluded,
+        out-of-date-range and too-deep directories are pruned.
+        
+        By default the frontier is a stack and directories come out depth
+        first in listing order. With ``by_priority`` it is a heap keyed on
+        (-priority, discovery order), so the highest-priority directory found
+        so far is always listed next; ``pending``, if given, is kept updated
+        with the number of queued directories per priority.
+        
+        Directories are listed through an open fd where supported, so the
+        yielded entries carry only their names (join them to ``dir_path``)
+        and are only valid until the generator is resumed.
+        """
+        frontier: List[tuple] = []
+        seq = 0
+        if by_priority:
+            for root in roots:
+                frontier.append((-Priority.MAIN, seq, root, None, 0))
+                seq += 1
+            if pending is not None and roots:
+                pending[Priority.MAIN] = pending.get(Priority.MAIN, 0) + len(roots)
+        else:
+            frontier.extend((root, None, 0) for root in reversed(roots))
+        
+        while frontier:
+            if by_priority:
+                _neg_priority, _seq, dir_path, matched, depth = heapq.heappop(frontier)
+            else:
+                dir_path, matched, depth = frontier.pop()
+            priority = Priority.MAIN if matched is None else matched
+            if pending is not None:
+                pending[priority] -= 1
+            
+            dir_fd = _open_dir(dir_path)
+            try:
+                files, subdirs = self._scan_dir(dir_path, dir_fd)
+                yield dir_path, priority, depth, files
+            finally:
+                if dir_fd is not None:
+                    os.close(dir_fd)
+            
+            subdirs = self._prune_subdirs(dir_path, subdirs, depth, exclude, max_depth, date_range)
+            prefix = os.path.join(dir_path, '')
+            if by_priority:
+                for sub in subdirs:
+                    sub_matched = _descend_priority(matched, sub.name)
+                    sub_priority = Priority.MAIN if sub_matched is None else sub_matched
+                    heapq.heappush(frontier, (-sub_priority, seq, prefix + sub.name, sub_matched, depth + 1))
+                    seq += 1
+                    if pending is not None:
+                        pending[sub_priority] = pending.get(sub_priority, 0) + 1
+            else:
+                # Push in reverse so directories are visited in listing order
+                for sub in reversed(subdirs):
+                    frontier.append((prefix + sub.name, _descend_priority(matched, sub.name), depth + 1))
+    
+    def _prune_subdirs(
+        self,
+        dir_path: str,
+        subdirs: List[os.DirEntry],
+        depth: int,
+        exclude: frozenset,
+        max_depth: Optional[int],
+        date_range: Optional[Tuple[datetime, datetime]] = None
+    ) -> List[os.DirEntry]:
+        """Drop subdirectories that are too deep, excluded or outside the date range."""
+        if max_depth is not None and depth >= max_depth:
+            return []
+        if exclude:
+            subdirs = [d for d in subdirs if d.name not in exclude]
+        if date_range:
+            subdirs = self._filter_dirs_by_date(dir_path, subdirs, date_range)
+        return subdirs
+    
+    def _walk_entries(
+        self,
+        search_paths: List[str],
+        exclude: frozenset,
+        max_depth: Optional[int],
+        date_range: Optional[Tuple[datetime, datetime]] = None
+    ) -> Generator[Tuple[str, Optional[os.DirEntry]], None, None]:
+        """Yield (file_path, DirEntry) for every candidate file, in search-path order.
+        
+        Search paths that are plain files are yielded as they are, without an
+        entry.
+        """
+        for path in search_paths:
+            if os.path.isfile(path):
+                yield path, None
+            elif os.path.exists(path):
+                for dir_path, _priority, _depth, files in self._walk_dirs([path], exclude, max_depth, date_range):
+                    prefix = os.path.join(dir_path, '')
+                    for entry in files:
+                        yield prefix + entry.name, entry
     
     def _search_incremental(
         self, 
@@ -292,10 +836,9 @@ class SimpleSearchEngine(SearchEngine):
             SearchResult objects as they're found
         """
         import time
-        import threading
         
-        exclude = set(getattr(query, 'exclude_dirs', []))
-        self._date_range = getattr(query, 'date_range', None)
+        exclude = frozenset(getattr(query, 'exclude_dirs', None) or ())
+        compiled = _compile_query(query)
         
         # Priority levels to search in order (high to low)
         priority_order = [
@@ -305,13 +848,15 @@ class SimpleSearchEngine(SearchEngine):
             Priority.GENERATED, Priority.EXCLUDED
         ]
         
-        # Track which priorities we've searched
-        searched_priorities: set = set()
+        # One walk groups every directory by priority for all levels below
+        dirs_by_priority = self._collect_dirs_by_priority(
+            search_paths, exclude, query.max_depth, compiled.date_range
+        )
+        
         found_results = False
         start_time = time.time()
         
         # Use a queue to collect results from background search
-        import queue
         results_queue: queue.Queue = queue.Queue()
         stop_search = threading.Event()
         
@@ -322,24 +867,20 @@ class SimpleSearchEngine(SearchEngine):
                     if stop_search.is_set():
                         break
                         
-                    dirs_at_priority = self._collect_dirs_for_priority(
-                        search_paths, exclude, priority
-                    )
+                    if priority not in dirs_by_priority:
+                        continue
                     
-                    for dir_path, depth in dirs_at_priority:
+                    paths, _depths = dirs_by_priority[priority]
+                    for dir_path in paths:
                         if stop_search.is_set():
                             break
-                        try:
-                            files = os.listdir(dir_path)
-                        except OSError:
-                            continue
+                        files, _subdirs = self._scan_dir(dir_path)
                         
-                        for file in files:
+                        for entry in files:
                             if stop_search.is_set():
                                 break
-                            file_path = os.path.join(dir_path, file)
-                            result = self._process_file(file_path, query)
-                            if result and self._matches_query(result, query):
+                            result = self._process_file(entry.path, compiled, entry)
+                            if result and self._matches_query(result, compiled):
                                 results_queue.put(result)
             finally:
                 results_queue.put(None)  # Sentinel to signal completion
@@ -349,7 +890,6 @@ class SimpleSearchEngine(SearchEngine):
         
         while current_priority_idx < len(priority_order):
             priorities_to_search = [priority_order[current_priority_idx]]
-            searched_priorities.add(priority_order[current_priority_idx])
             
             # Start background search
             search_thread = threading.Thread(
@@ -394,11 +934,6 @@ class SimpleSearchEngine(SearchEngine):
             search_thread.join(timeout=0.5)
             stop_search.clear()
             
-            # If we found results, we can stop early (user found what they want)
-            if results_in_batch and self.priority_callback:
-                # User got results, but we can continue in background if they want more
-                pass
-            
             # Move to next priority level
             current_priority_idx += 1
             
@@ -417,45 +952,25 @@ class SimpleSearchEngine(SearchEngine):
             except queue.Empty:
                 break
     
-    def _collect_dirs_for_priority(
+    def _collect_dirs_by_priority(
         self,
         search_paths: List[str],
-        exclude: set,
-        target_priority: Priority
-    ) -> List[Tuple[str, int]]:
-        """Collect all directories matching a specific priority."""
-        result_dirs = []
+        exclude: frozenset,
+        max_depth: Optional[int],
+        date_range: Optional[Tuple[datetime, datetime]] = None
+    ) -> Dict[Priority, Tuple[List[str], array]]:
+        """Walk the search paths once and group every directory by priority.
         
-        for path in search_paths:
-            if not os.path.exists(path):
-                continue
-            
-            abs_search_path = os.path.abspath(path)
-            
-            if os.path.isfile(path):
-                continue
-            
-            for root, dirs, files in os.walk(path):
-                dirs[:] = [d for d in dirs if d not in exclude]
-                
-                if self._date_range:
-                    dirs[:] = self._filter_dirs_by_date(root, dirs, self._date_range)
-                
-                abs_root = os.path.abspath(root)
-                rel_root = os.path.relpath(abs_root, abs_search_path)
-                
-                depth = 0 if rel_root == '.' else len([p for p in rel_root.split(os.sep) if p and p != '.'])
-                
-                priority = _get_directory_priority(rel_root)
-                if priority == target_priority:
-                    result_dirs.append((root, depth))
-                
-                # Continue walking to find all matching dirs
-                if priority > target_priority:
-                    # Still descending, keep going
-                    pass
-                    
-        return result_dirs
+        Each priority maps to parallel (paths, depths) sequences rather than
+        one tuple per directory; depths are kept in an ``array('i')``.
+        """
+        dirs_by_priority: Dict[Priority, Tuple[List[str], array]] = {}
+        _root_files, roots = self._split_roots(search_paths)
+        for root, priority, depth, _files in self._walk_dirs(roots, exclude, max_depth, date_range):
+            paths, depths = dirs_by_priority.setdefault(priority, ([], array('i')))
+            paths.append(root)
+            depths.append(depth)
+        return dirs_by_priority
     
     def _search_by_priority(
         self, 
@@ -464,202 +979,268 @@ class SimpleSearchEngine(SearchEngine):
     ) -> Generator[SearchResult, None, None]:
         """Search directories by priority - high priority first.
         
-        This mode organizes directories by importance (source code first, 
-        cache/temp last) and yields results as each priority level completes.
+        Directories are kept on a heap keyed by (-priority, discovery order)
+        and scanned as they are discovered, so results stream out while the
+        tree is still being walked instead of after a full enumeration. A
+        directory's priority is the highest of its path segments, so children
+        never rank below their parent; a high-priority directory nested under
+        a lower-priority one is still searched as soon as it is found.
+        
+        The priority callback fires each time the priority being searched
+        changes, with the results of the run that just finished (see
+        ``search`` for the callback contract).
         
         Args:
             query: The search query
             search_paths: List of paths to search
             
         Yields:
-            SearchResult objects sorted by directory priority
+            SearchResult objects in directory priority order
         """
-        exclude = set(getattr(query, 'exclude_dirs', []))
+        exclude = frozenset(getattr(query, 'exclude_dirs', None) or ())
+        max_depth = query.max_depth
+        callback = self.priority_callback
+        compiled = _compile_query(query)
         
-        # Store date range for early directory pruning
-        self._date_range = getattr(query, 'date_range', None)
+        root_files, roots = self._split_roots(search_paths)
+        for path in root_files:
+            result = self._process_file(path, compiled)
+            if result and self._matches_query(result, compiled):
+                yield result
         
-        # Collect all directories with their priorities
-        all_dirs_by_priority: Dict[Priority, List[Tuple[str, int]]] = {}
+        pending: Dict[Priority, int] = {}
+        current: Optional[Priority] = None
+        level = 0
+        level_paths: List[str] = []
         
-        for path in search_paths:
-            if not os.path.exists(path):
-                continue
-            
-            abs_search_path = os.path.abspath(path)
+        for dir_path, priority, _depth, files in self._walk_dirs(
+            roots, exclude, max_depth, compiled.date_range, by_priority=True, pending=pending
+        ):
+            if priority != current:
+                if callback and current is not None:
+                    queued = sum(1 for p, n in pending.items() if n and p != priority)
+                    callback(current.name, level, level + queued + 1, level_paths)
+                    level_paths = []
+                current = priority
+                level += 1
             
-            if os.path.isfile(path):
-                result = self._process_file(path, query)
-                if result and self._matches_query(result, query):
+            prefix = os.path.join(dir_path, '')
+            for entry in files:
+                result = self._process_file(prefix + entry.name, compiled, entry)
+                if result and self._matches_query(result, compiled):
+                    if callback:
+                        level_paths.append(result.file_path)
                     yield result
-                continue
-            
-            # Walk directory tree and collect all directories
-            for root, dirs, files in os.walk(path):
-                # Prune excluded directories
-                dirs[:] = [d for d in dirs if d not in exclude]
-                
-                # Early date-based directory pruning
-                if self._date_range:
-                    dirs[:] = self._filter_dirs_by_date(root, dirs, self._date_range)
-                
-                abs_root = os.path.abspath(root)
-                rel_root = os.path.relpath(abs_root, abs_search_path)
-                
-                if rel_root == '.':
-                    depth = 0
-                else:
-                    depth = len([p for p in rel_root.split(os.sep) if p and p != '.'])
-                
-                if query.max_depth is not None and depth > query.max_depth:
-                    continue
-                
-                # Get priority for this directory
-                priority = _get_directory_priority(rel_root)
-                
-                if priority not in all_dirs_by_priority:
-                    all_dirs_by_priority[priority] = []
-                all_dirs_by_priority[priority].append((root, depth))
-        
-        # Sort priorities from high to low
-        sorted_priorities = sorted(all_dirs_by_priority.keys(), reverse=True)
-        total_priorities = len(sorted_priorities)
-        
-        # Search each priority level
-        for idx, priority in enumerate(sorted_priorities):
-            priority_name = priority.name if hasattr(priority, 'name') else str(priority)
-            dirs = all_dirs_by_priority[priority]
-            
-            priority_results = []
-            
-            # Search all directories at this priority level
-            for dir_path, depth in dirs:
-                if query.max_depth is not None and depth > query.max_depth:
-                    continue
-                    
-                try:
-                    files = os.listdir(dir_path)
-                except OSError:
-                    continue
-                
-                for file in files:
-                    file_path = os.path.join(dir_path, file)
-                    result = self._process_file(file_path, query)
-                    if result and self._matches_query(result, query):
-                        priority_results.append(result)
-            
-            # Emit results from this priority level
-            for result in priority_results:
-                yield result
-            
-            # Call progress callback if provided
-            if self.priority_callback:
-                result_paths = [r.file_path for r in priority_results]
-                self.priority_callback(
-                    priority_name, 
-                    idx + 1, 
-                    total_priorities, 
-                    result_paths
-                )
+        
+        if callback and current is not None:
+            callback(current.name, level, level, level_paths)
     
     def _search_parallel(
         self, 
         query: SearchQuery, 
         search_paths: List[str], 
-        exclude: set,
-        initial_count: int
+        exclude: frozenset,
+        initial_count: int,
+        compiled: _CompiledQuery
     ) -> Generator[SearchResult, None, None]:
-        """Parallel directory search with date-based filtering."""
+        """Parallel search over a shared queue of directories.
+        
+        Worker threads pop a directory, scandir it, push its subdirectories
+        back onto the queue and match its files, so the traversal itself runs
+        in parallel rather than only the per-file work. Directories with more
+        than ``_STAT_BATCH_SIZE`` files are split into batches that idle
+        workers pick up. Several directory roots are instead searched in
+        separate processes, one root each, when the engine was created with
+        ``use_processes`` (see ``_search_roots_in_processes``).
+        
+        The work queue is unbounded (workers both produce and consume it), but
+        the result queue is bounded so a slow consumer applies backpressure
+        instead of letting matches pile up in memory.
+        
+        Every search starts its own daemon worker threads, which exit as soon
+        as the tree is exhausted or the search is stopped. A generator left
+        partly consumed therefore never holds up another search, nor
+        interpreter exit.
+        """
         count = initial_count
+        max_depth = query.max_depth
+        batch_size = _STAT_BATCH_SIZE
         
-        # First, collect all directories to search
-        all_dirs: List[Tuple[str, int]] = []  # (directory_path, depth)
+        # Work items are (dir_path, depth, files); files=None means "scan dir_path"
+        work: queue.SimpleQueue = queue.SimpleQueue()
+        results: queue.Queue = queue.Queue(maxsize=self.max_workers * 4)
+        stop = threading.Event()
+        lock = threading.Lock()
+        outstanding = 0
         
-        for path in search_paths:
-            if not os.path.exists(path):
-                continue
-            
-            abs_search_path = os.path.abspath(path)
-            
-            if os.path.isfile(path):
-                result = self._process_file(path, query)
-                if result and self._matches_query(result, query):
+        def add_work(items: List[tuple]) -> None:
+            nonlocal outstanding
+            with lock:
+                outstanding += len(items)
+            for item in items:
+                work.put(item)
+        
+        def publish(item: Optional[List[SearchResult]]) -> None:
+            # Re-check stop while blocked so workers never wait on a consumer that left
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+        
+        def finish_item() -> None:
+            nonlocal outstanding
+            with lock:
+                outstanding -= 1
+                done = outstanding == 0
+            if done:
+                # The whole tree has been processed: release the workers,
+                # then tell the consumer
+                for _ in range(self.max_workers):
+                    work.put(None)
+                publish(None)
+        
+        def worker() -> None:
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                try:
+                    if stop.is_set():
+                        continue
+                    dir_path, depth, files = item
+                    if files is None:
+                        files, subdirs = self._scan_dir(dir_path)
+                        subdirs = self._prune_subdirs(
+                            dir_path, subdirs, depth, exclude, max_depth, compiled.date_range
+                        )
+                        more = [(sub.path, depth + 1, None) for sub in subdirs]
+                        more.extend(
+                            (dir_path, depth, files[k:k + batch_size])
+                            for k in range(batch_size, len(files), batch_size)
+                        )
+                        files = files[:batch_size]
+                        if more:
+                            add_work(more)
+                    
+                    matched = []
+                    for entry in files:
+                        if stop.is_set():
+                            break
+                        result = self._process_file(entry.path, compiled, entry)
+                        if result and self._matches_query(result, compiled, content_pool):
+                            matched.append(result)
+                    if matched:
+                        publish(matched)
+                except Exception:
+                    pass
+                finally:
+                    finish_item()
+        
+        root_files, roots = self._split_roots(search_paths)
+        for path in root_files:
+            result = self._process_file(path, compiled)
+            if result and self._matches_query(result, compiled):
+                yield result
+                count += 1
+                if count >= query.max_results:
+                    return
+        
+        if not roots:
+            return
+        
+        if len(roots) > 1 and self.use_processes:
+            yield from self._search_roots_in_processes(query, roots, count)
+            return
+        
+        # With use_processes, large files are content-scanned in worker
+        # processes, which hold no GIL; hyperscan already releases it
+        content_pool = None
+        if self.use_processes and compiled.match_content and hyperscan is None:
+            content_pool = _get_process_pool()
+        
+        add_work([(root, 0, None) for root in roots])
+        for _ in range(self.max_workers):
+            threading.Thread(target=worker, name='qry-search', daemon=True).start()
+        
+        try:
+            while True:
+                try:
+                    # Short timeout keeps Ctrl+C responsive where blocking gets aren't interruptible
+                    matched = results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if matched is None:
+                    break
+                for result in matched:
                     yield result
                     count += 1
                     if count >= query.max_results:
                         return
-            else:
-                for root, dirs, files in os.walk(path):
-                    dirs[:] = [d for d in dirs if d not in exclude]
-                    
-                    # Early date-based directory pruning
-                    if self._date_range:
-                        dirs[:] = self._filter_dirs_by_date(root, dirs, self._date_range)
-                    
-                    abs_root = os.path.abspath(root)
-                    rel_root = os.path.relpath(abs_root, abs_search_path)
-                    
-                    if rel_root == '.':
-                        depth = 0
-                    else:
-                        depth = len([p for p in rel_root.split(os.sep) if p and p != '.'])
-                    
-                    if query.max_depth is not None and depth >= query.max_depth:
-                        dirs[:] = []
-                        if depth > query.max_depth:
-                            continue
-                    
-                    all_dirs.append((root, depth))
+        finally:
+            # Stop early (max_results, Ctrl+C, generator closed) and release workers
+            stop.set()
+            for _ in range(self.max_workers):
+                work.put(None)
+    
+    def _search_roots_in_processes(
+        self,
+        query: SearchQuery,
+        roots: List[str],
+        initial_count: int
+    ) -> Generator[SearchResult, None, None]:
+        """Search each root in its own worker process and merge the results.
         
-        # Process files in directories in parallel
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            futures = {}
-            for dir_path, depth in all_dirs:
-                if query.max_depth is not None and depth > query.max_depth:
-                    continue
-                try:
-                    files = os.listdir(dir_path)
-                except OSError:
-                    continue
-                future = executor.submit(self._process_directory, dir_path, files, query)
-                futures[future] = dir_path
-            
+        Matching files is pure-Python work that threads cannot run in
+        parallel under the GIL; separate processes can. Only used for more
+        than one root, where the inter-process round trip is worth paying.
+        
+        Roots run on the shared worker pool (``_get_process_pool``), whose
+        workers outlive the search. A root's results arrive all at once when
+        its process finishes, so unlike the threaded path this does not
+        stream matches while a root is still being walked. Stopping early
+        cancels the roots that have not started; running ones finish in
+        their worker and their results are dropped.
+        
+        A root whose worker fails (e.g. processes cannot be started from the
+        calling script) is searched in this thread instead, never dropped.
+        """
+        count = initial_count
+        futures: Dict = {}
+        try:
+            pool = _get_process_pool()
+            for root in roots:
+                futures[pool.submit(_search_root, root, query, self.inode_order)] = root
+        except Exception:
+            pass  # Roots that were not submitted are searched below
+        
+        def root_results() -> Generator[List[SearchResult], None, None]:
             for future in as_completed(futures):
-                if count >= query.max_results:
-                    executor.shutdown(wait=False)
-                    break
                 try:
-                    results = future.result()
-                    for result in results:
-                        if self._matches_query(result, query):
-                            yield result
-                            count += 1
-                            if count >= query.max_results:
-                                break
+                    yield future.result()
                 except Exception:
-                    pass
-    
-    def _process_directory(
-        self, 
-        dir_path: str, 
-        files: List[str], 
-        query: SearchQuery
-    ) -> List[SearchResult]:
-        """Process all files in a directory (for parallel execution)."""
-        results = []
-        for file in files:
-            file_path = os.path.join(dir_path, file)
-            result = self._process_file(file_path, query)
-            if result:
-                results.append(result)
-        return results
+                    yield _search_root(futures[future], query, self.inode_order)
+            for root in roots[len(futures):]:
+                yield _search_root(root, query, self.inode_order)
+        
+        try:
+            for matched in root_results():
+                for result in matched:
+                    yield result
+                    count += 1
+                    if count >= query.max_results:
+                        return
+        finally:
+            for future in futures:
+                future.cancel()
     
     def _filter_dirs_by_date(
         self, 
         parent_dir: str, 
-        dirs: List[str],
+        dirs: List[os.DirEntry],
         date_range: Optional[Tuple[datetime, datetime]]
-    ) -> List[str]:
+    ) -> List[os.DirEntry]:
         """Filter directories by date based on directory name (e.g., 2024-01-15)."""
         if not date_range:
             return dirs
@@ -668,9 +1249,8 @@ class SimpleSearchEngine(SearchEngine):
         filtered = []
         
         for d in dirs:
-            dir_path = os.path.join(parent_dir, d)
             # Try to parse directory name as date
-            parsed_date = self._parse_dir_date(d)
+            parsed_date = self._parse_dir_date(d.name)
             if parsed_date is not None:
                 # Directory has date in name - check if it's in range
                 if parsed_date < start_date or parsed_date > end_date:
@@ -680,27 +1260,39 @@ class SimpleSearchEngine(SearchEngine):
         
         return filtered
     
-    def _parse_dir_date(self, dir_name: str) -> Optional[datetime]:
-        """Try to parse a directory name as a date."""
-        # Common date formats in directory names
-        date_formats = [
-            "%Y-%m-%d", "%Y%m%d", "%d-%m-%Y", "%m-%d-%Y",
-            "%Y_%m_%d", "%Y%m", "%Y", "%B_%Y", "%b_%Y",
-        ]
+    @staticmethod
+    @lru_cache(maxsize=8192)
+    def _parse_dir_date(dir_name: str) -> Optional[datetime]:
+        """Try to parse a directory name as a date.
         
-        # Try to extract date from directory name
-        # Remove common prefixes/suffixes
+        Recognizes %Y-%m-%d, %Y_%m_%d, %Y%m%d, %Y%m, %Y, %d-%m-%Y, %m-%d-%Y
+        and %B_%Y / %b_%Y with one anchored regex, then falls back to the
+        first YYYY[-_]MM[-_]DD-like run anywhere in the name. Results are
+        cached because the same directory names recur across a tree.
+        """
         cleaned = dir_name.strip()
         
-        for fmt in date_formats:
+        m = _DIR_DATE_RX.fullmatch(cleaned)
+        if m:
             try:
-                return datetime.strptime(cleaned, fmt)
+                if m.group('y'):
+                    month = m.group('m') or m.group('m2') or m.group('m3')
+                    day = m.group('d') or m.group('d2')
+                    return datetime(int(m.group('y')), int(month or 1), int(day or 1))
+                if m.group('y3'):
+                    a, b, year = int(m.group('a')), int(m.group('b')), int(m.group('y3'))
+                    try:
+                        return datetime(year, b, a)  # %d-%m-%Y
+                    except ValueError:
+                        return datetime(year, a, b)  # %m-%d-%Y
+                month = _MONTH_NAMES.get(m.group('mon').lower())
+                if month:
+                    return datetime(int(m.group('y4')), month, 1)
             except ValueError:
-                continue
+                pass
         
         # Try to find a date pattern in the name
-        date_pattern = re.compile(r'(\d{4})[-_]?(\d{2})?[-_]?(\d{2})?')
-        match = date_pattern.search(cleaned)
+        match = _DIR_DATE_SEARCH_RX.search(cleaned)
         if match:
             try:
                 year = int(match.group(1))
@@ -715,27 +1307,48 @@ class SimpleSearchEngine(SearchEngine):
     def _process_file(
         self, 
         file_path: str, 
-        query: SearchQuery
+        compiled: _CompiledQuery,
+        entry: Optional[os.DirEntry] = None
     ) -> Optional[SearchResult]:
-        """Process a single file and return a SearchResult if it matches the query."""
+        """Process a single file and return a SearchResult if it matches the query.
+
+        When the file came from ``os.scandir`` its DirEntry is passed in so
+        ``entry.stat()`` can be used instead of a separate ``os.stat`` call.
+        Path-only checks run first, so rejected files are never stat'ed, and
+        the size, date and content-type filters run before a SearchResult is
+        built; ``_matches_query`` is left with the text/content match.
+        """
+        if not self._prefilter_name(file_path, compiled):
+            return None
         try:
-            # Use cached stat if enabled
-            if self.use_cache:
-                stat = _cached_stat(file_path)
-            else:
-                stat = os.stat(file_path)
+            # DirEntry caches its own stat result, fresh for this walk
+            stat = entry.stat() if entry is not None else os.stat(file_path)
             
-            if stat is None:
+            # Size limits only need the stat result, check before MIME lookup
+            if compiled.min_size is not None and stat.st_size < compiled.min_size:
                 return None
+            if compiled.max_size is not None and stat.st_size > compiled.max_size:
+                return None
+            
+            # Compare raw st_mtime against precomputed float bounds; datetimes
+            # are only built for files that pass every filter
+            if compiled.date_bounds:
+                start_ts, end_ts = compiled.date_bounds
+                if stat.st_mtime < start_ts or stat.st_mtime > end_ts:
+                    return None
                 
-            file_type = Path(file_path).suffix.lower()
+            file_type = _file_suffix(file_path)
             
-            # Get MIME type (fallback when python-magic is unavailable)
-            if self.mime:
+            # Extension-based MIME type; sniffing file headers with libmagic
+            # costs an open+read per file, so only do it when the query needs it
+            if self.mime and compiled.content_types:
                 content_type = self.mime.from_file(file_path)
             else:
-                content_type = "application/octet-stream"
+                content_type = self._mime_table.get(file_type, "application/octet-stream")
+            if compiled.content_types and content_type not in compiled.content_types:
+                return None
             
+            modified = datetime.fromtimestamp(stat.st_mtime)
             return SearchResult(
                 file_path=file_path,
                 file_type=file_type,
@@ -743,84 +1356,186 @@ class SimpleSearchEngine(SearchEngine):
                 data={},
                 metadata={
                     'size': stat.st_size,
-                    'modified': datetime.fromtimestamp(stat.st_mtime),
+                    'modified': modified,
                     'created': datetime.fromtimestamp(stat.st_ctime)
                 },
-                timestamp=datetime.fromtimestamp(stat.st_mtime),
+                timestamp=modified,
                 size=stat.st_size
             )
         except Exception:
             return None
     
-    def _matches_query(self, result: SearchResult, query: SearchQuery) -> bool:
-        """Check if a result matches the query.
+    def _prefilter_name(self, file_path: str, compiled: _CompiledQuery) -> bool:
+        """Cheap checks that only need the path, run before any stat or MIME call.
         
-        Order of checks is optimized for performance:
-        1. File type (dict lookup - fastest)
-        2. Size filtering (stat cache - O(1))
-        3. Date range (stat cache - O(1))
-        4. Filename match (string compare - fast)
-        5. Content search (I/O bound - SLOWEST, check LAST)
+        Rejects files whose extension is not in the query's file types and,
+        in filename mode, files whose path does not match the query text.
         """
-        # 1. File type filtering (FASTEST - dict lookup)
-        if query.file_types and result.file_type.lstrip('.') not in query.file_types:
-            return False
-        
-        # 2. Size filtering (stat cache - O(1))
-        if query.min_size is not None and result.size < query.min_size:
+        if compiled.file_suffixes and _file_suffix(file_path) not in compiled.file_suffixes:
             return False
-        if query.max_size is not None and result.size > query.max_size:
-            return False
-            
-        # 3. Date range filtering (stat cache - O(1))
-        if query.date_range:
-            start_date, end_date = query.date_range
-            if result.timestamp < start_date or result.timestamp > end_date:
-                return False
-
-        # 4. Filename/text matching (string compare - fast)
-        if query.query_text:
-            query_lower = query.query_text.lower()
-
-            if query.use_regex:
-                rx = _get_cached_regex(query.query_text, re.IGNORECASE)
-                filename_match = bool(rx.search(result.file_path))
-            elif " or " in query_lower:
-                terms = [t.strip() for t in query_lower.split(" or ") if t.strip()]
-                filename_match = any(t in result.file_path.lower() for t in terms)
-            else:
-                filename_match = query_lower in result.file_path.lower()
-            
-            mode = getattr(query, 'search_mode', 'filename')
-            
-            # 5. Content search (SLOWEST - I/O bound, check LAST)
-            if mode == "content":
-                # For content-only mode, skip filename check
-                match = self._search_in_content(result.file_path, query, query_lower)
-            elif mode == "both":
-                # Check filename first, only do content search if filename doesn't match
-                match = filename_match or self._search_in_content(result.file_path, query, query_lower)
-            else:  # filename (default)
-                match = filename_match
-
-            if not match:
-                return False
-                
+        if compiled.match_filename:
+            return self._filename_matches(file_path, compiled)
         return True
     
-    def _search_in_content(self, file_path: str, query: SearchQuery, query_lower: str) -> bool:
-        """Search for query text in file content."""
-        if query.use_regex:
-            return self._regex_search_file(file_path, query.query_text)
-        if " or " in query_lower:
-            patterns = [t.strip() for t in query_lower.split(" or ") if t.strip()]
-        else:
-            patterns = [query_lower]
-        return self._fast_searcher.search_file(file_path, patterns, case_sensitive=False)
+    @staticmethod
+    def _filename_matches(file_path: str, compiled: _CompiledQuery) -> bool:
+        """Match the query text against a file path (case-insensitive)."""
+        patterns = compiled.patterns
+        if compiled.use_regex:
+            return bool(_get_cached_regex(patterns[0], re.IGNORECASE).search(file_path))
+        if len(patterns) >= _OR_REGEX_MIN_TERMS:
+            automaton = get_automaton(patterns)
+            if automaton is not None:
+                return next(automaton.iter(file_path.lower()), None) is not None
+            return _get_terms_regex(patterns).search(file_path) is not None
+        file_path_lower = file_path.lower()
+        if len(patterns) == 1:
+            return patterns[0] in file_path_lower
+        for term in patterns:
+            if term in file_path_lower:
+                return True
+        return False
+    
+    def _matches_query(
+        self,
+        result: SearchResult,
+        compiled: _CompiledQuery,
+        pool: Optional[ProcessPoolExecutor] = None
+    ) -> bool:
+        """Check the parts of the query that need the file's content.
+        
+        ``_process_file`` only returns results that already passed every
+        cheap filter - file type, content type, size, date range and, in
+        filename mode, the filename match - so those are not re-checked
+        here. What is left is the I/O-bound content search, run last.
+        ``pool`` is passed on to ``_search_in_content``.
+        """
+        if not compiled.match_content:
+            return True
+        
+        if compiled.mode == "both" and self._filename_matches(result.file_path, compiled):
+            # Check filename first, only do content search if filename doesn't match
+            return True
+        return self._search_in_content(result.file_path, compiled, result.size, pool)
+    
+    def _search_in_content(
+        self,
+        file_path: str,
+        compiled: _CompiledQuery,
+        size: int = 0,
+        pool: Optional[ProcessPoolExecutor] = None
+    ) -> bool:
+        """Search file content for the compiled query's pattern or terms.
+        
+        ``re`` and the pure-Python block scan hold the GIL, so the worker
+        threads of ``_search_parallel`` pass a process pool when the engine
+        has ``use_processes``, and large files are scanned there while the
+        calling thread just waits. Without a pool
+        (sequential search) or with hyperscan, whose scans release the GIL,
+        files are scanned in-thread. Small files are not worth the round trip.
+        """
+        if pool is not None and hyperscan is None and size >= _CONTENT_PROCESS_MIN_SIZE:
+            try:
+                return pool.submit(
+                    _content_scan_worker, file_path, compiled.use_regex,
+                    compiled.patterns[0], compiled.needles
+                ).result()
+            except Exception:
+                pass  # e.g. a broken pool; scan in this thread instead
+        return _content_scan_worker(
+            file_path, compiled.use_regex, compiled.patterns[0], compiled.needles
+        )
+
+    @staticmethod
+    def _literal_search_file(file_path: str, needles: Tuple[bytes, ...]) -> bool:
+        """Search file content for any of the lowercased byte strings.
+        
+        With hyperscan installed the whole file is mapped and scanned for all
+        needles in one call, which runs without holding the GIL so parallel
+        workers really do scan at the same time. Otherwise it reads
+        fixed-size binary blocks and lowercases each one (ASCII, like
+        ``bytes.lower``), so there is no decoding or line splitting and the
+        scan stops at the first hit. Many terms are matched per block with
+        the shared Aho-Corasick automaton when pyahocorasick is available.
+        """
+        if not all(needles):
+            return True
+        db = _get_hyperscan_literal_db(needles)
+        if db is not None:
+            try:
+                with open(file_path, 'rb') as f:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        return _hyperscan_match(db, mm)
+            except (ValueError, OSError, hyperscan.error):
+                pass  # e.g. empty files, which mmap rejects
+        automaton = None
+        if len(needles) >= _OR_REGEX_MIN_TERMS:
+            automaton = get_automaton(tuple(n.decode('latin-1') for n in needles))
+        overlap = max(len(n) for n in needles) - 1
+        tail = b''
+        try:
+            with open(file_path, 'rb') as f:
+                while True:
+                    block = f.read(_CONTENT_BLOCK_SIZE)
+                    if not block:
+                        return False
+                    data = tail + block.lower() if tail else block.lower()
+                    if automaton is not None:
+                        # latin-1 maps each byte to one code point
+                        if next(automaton.iter(data.decode('latin-1')), None) is not None:
+                            return True
+                    else:
+                        for needle in needles:
+                            if needle in data:
+                                return True
+                    tail = data[-overlap:] if overlap else b''
+        except OSError:
+            return False
 
     @staticmethod
     def _regex_search_file(file_path: str, pattern: str) -> bool:
-        """Search file content with a regex pattern."""
+        """Search file content with a regex pattern.
+        
+        ASCII patterns run once over a read-only mmap of the whole file
+        (``re.MULTILINE`` keeps ``^``/``$`` anchored at line boundaries), so
+        the scan happens in C without decoding or splitting lines. If
+        hyperscan is installed and supports the pattern, its DFA-based
+        scanner rules out non-matching files first and ``re`` only runs on
+        files it hits. Other patterns, and files that
+        cannot be mapped (e.g. empty ones), are scanned line by line as text.
+        
+        On raw bytes ``$`` does not match before ``\\r\\n`` (nor ``^`` after a
+        lone ``\\r``), so anchored patterns over files containing ``\\r`` also
+        take the text path, whose universal newlines handle every line ending.
+        Matches must lie within one line, as in the text scan (and in
+        ``get_content_snippet``): a whole-buffer hit that spans a line break
+        is re-checked line by line.
+        """
+        brx = _get_cached_bytes_regex(pattern, re.IGNORECASE | re.MULTILINE)
+        anchored = '$' in pattern or '^' in pattern
+        if brx is not None:
+            try:
+                with open(file_path, 'rb') as f:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if not anchored or mm.find(b'\r') == -1:
+                            db = _get_hyperscan_db(brx.pattern)
+                            try:
+                                # A hyperscan miss is final; a hit is located with re
+                                if db is not None and not _hyperscan_match(db, mm):
+                                    return False
+                            except hyperscan.error:
+                                pass
+                            match = brx.search(mm)
+                            if match is None:
+                                return False
+                            span = mm[match.start():match.end()]
+                            if b'\n' not in span and b'\r' not in span:
+                                return True
+                            # The hit spans a line break (e.g. via \s or [^x]),
+                            # which no single line allows: let the line scan decide
+            except (ValueError, OSError):
+                pass
+        
         rx = _get_cached_regex(pattern, re.IGNORECASE)
         try:
             with open(file_path, 'r', errors='ignore') as f:
@@ -833,7 +1548,12 @@ class SimpleSearchEngine(SearchEngine):
 
     @staticmethod
     def get_content_snippet(file_path: str, query_text: str, context_lines: int = 1, use_regex: bool = False) -> Optional[str]:
-        """Return first matching line with context for content search preview."""
+        """Return first matching line with context for content search preview.
+        
+        The file is streamed: only the last ``context_lines`` lines are kept
+        as leading context, and reading stops once the trailing context
+        after the first hit has been read.
+        """
         try:
             if use_regex:
                 rx = _get_cached_regex(query_text, re.IGNORECASE)
@@ -841,18 +1561,20 @@ class SimpleSearchEngine(SearchEngine):
                 rx = None
             q_lower = query_text.lower()
             terms = [t.strip() for t in q_lower.split(" or ") if t.strip()] if " or " in q_lower else [q_lower]
-            lines = []
             with open(file_path, 'r', errors='ignore') as f:
-                lines = f.readlines()
-            for i, line in enumerate(lines):
-                hit = rx.search(line) if rx else any(t in line.lower() for t in terms)
-                if hit:
-                    start = max(0, i - context_lines)
-                    end = min(len(lines), i + context_lines + 1)
-                    snippet_lines = []
-                    for j in range(start, end):
-                        prefix = "»" if j == i else " "
-                        snippet_lines.append(f"{prefix} {j + 1}: {lines[j].rstrip()}")
+                lines = enumerate(f, 1)
+                before: Deque[Tuple[int, str]] = deque(maxlen=context_lines)
+                for i, line in lines:
+                    hit = rx.search(line) if rx else any(t in line.lower() for t in terms)
+                    if not hit:
+                        if context_lines:
+                            before.append((i, line))
+                        continue
+                    snippet_lines = [f"  {j}: {text.rstrip()}" for j, text in before]
+                    snippet_lines.append(f"» {i}: {line.rstrip()}")
+                    snippet_lines.extend(
+                        f"  {j}: {text.rstrip()}" for j, text in islice(lines, context_lines)
+                    )
                     return "\n".join(snippet_lines)
         except (OSError, IOError):
             pass
@@ -865,3 +1587,28 @@ class SimpleSearchEngine(SearchEngine):
     def is_available(self) -> bool:
         """Check if the search engine is available."""
         return True
+
+
+def _search_root(
+    root: str,
+    query: SearchQuery,
+    inode_order: bool
+) -> List[SearchResult]:
+    """Search a single root sequentially; run in a worker process.
+    
+    Module-level so ``ProcessPoolExecutor`` can pickle it.
+    """
+    engine = SimpleSearchEngine(max_workers=1, inode_order=inode_order)
+    return engine.search(query, [root])
+
+
+def _content_scan_worker(
+    file_path: str,
+    use_regex: bool,
+    pattern: str,
+    needles: Tuple[bytes, ...]
+) -> bool:
+    """Scan one file's content; module-level so it can run in a worker process."""
+    if use_regex:
+        return SimpleSearchEngine._regex_search_file(file_path, pattern)
+    return SimpleSearchEngine._literal_search_file(file_path, needles)
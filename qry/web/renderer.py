@@ -1,11 +1,133 @@
 """HTML rendering for search results."""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, TextIO, Tuple
+import io
 import os
-from datetime import datetime
+from functools import lru_cache
+from html import escape
+from itertools import islice
+from string import Formatter
+from time import localtime, strftime
 
 from ..core.models import SearchResult, SearchQuery
 
 
+_DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+
+# Used for base.html when the template directory does not provide one
+_DEFAULT_BASE_HTML = """
+                <!DOCTYPE html>
+                <html>
+                <head>
+                    <title>{title}</title>
+                    <meta charset="UTF-8">
+                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+                    <link href="https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css" rel="stylesheet">
+                </head>
+                <body class="bg-gray-100 p-8">
+                    <div class="max-w-4xl mx-auto">
+                        <h1 class="text-3xl font-bold mb-6">{title}</h1>
+                        <div class="mb-6">
+                            <p class="text-gray-600">Found {results_count} results for: <span class="font-semibold">{query}</span></p>
+                        </div>
+                        <div class="space-y-4">
+                            {results}
+                        </div>
+                        <div class="mt-8 text-center text-sm text-gray-500">
+                            <p>Generated on {now} • Qry v{version}</p>
+                        </div>
+                    </div>
+                </body>
+                </html>
+                """
+
+
+# Static scaffolding of one result item; _render_result_item interleaves
+# these with the per-result fields
+_ITEM_OPEN = """
+        <div class="bg-white rounded-lg shadow-md p-4 mb-4">
+            <div class="flex items-center justify-between">
+                <h3 class="text-lg font-semibold text-blue-600">
+                    <a href="file://"""
+_ITEM_NAME = """" class="hover:underline">
+                        """
+_ITEM_SIZE = """
+                    </a>
+                </h3>
+                <span class="text-sm text-gray-500">
+                    """
+_ITEM_PATH = """
+                </span>
+            </div>
+            
+            <div class="mt-2 text-sm text-gray-600">
+                <p class="truncate">"""
+_ITEM_TYPE = """</p>
+                <p class="mt-1">
+                    <span class="text-gray-700">Type:</span> """
+_ITEM_MODIFIED = """
+                    <span class="mx-2">•</span>
+                    <span class="text-gray-700">Modified:</span> """
+_ITEM_METADATA = """
+                </p>
+            </div>
+            
+            """
+_ITEM_CLOSE = """
+        </div>
+        """
+
+
+@lru_cache(maxsize=16)
+def _read_template(template_path: str) -> Optional[str]:
+    """Read a template file, caching the text (or None if it is missing) per path."""
+    try:
+        with open(template_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+@lru_cache(maxsize=16)
+def _split_template(template: str) -> Tuple[str, Optional[str]]:
+    """Split a ``str.format`` template into the parts before and after ``{results}``.
+    
+    Both halves stay valid format strings. The tail is None when the
+    template has no ``{results}`` field, in which case results are not shown.
+    """
+    halves: Tuple[List[str], List[str]] = ([], [])
+    side = 0
+    for literal, field, spec, conversion in Formatter().parse(template):
+        halves[side].append(literal.replace('{', '{{').replace('}', '}}'))
+        if field is None:
+            continue
+        if field == 'results' and side == 0:
+            side = 1
+            continue
+        halves[side].append(
+            '{' + field + ('!' + conversion if conversion else '') + (':' + spec if spec else '') + '}'
+        )
+    return ''.join(halves[0]), ''.join(halves[1]) if side else None
+
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+_SIZE_SCALES = tuple(float(1 << 10 * i) for i in range(len(_SIZE_UNITS)))
+
+
+@lru_cache(maxsize=4096)
+def _format_file_size(size_bytes: int) -> str:
+    """Format file size in a human-readable format.
+    
+    The unit index comes straight from ``bit_length()`` (every unit is ten
+    more bits), so there is no loop of repeated divisions. Results are
+    cached because sizes repeat a lot (empty files, whole pages/blocks).
+    Float sizes are accepted; only their integer part picks the unit.
+    """
+    unit = (int(size_bytes).bit_length() - 1) // 10 if size_bytes >= 1024 else 0
+    if unit > 5:
+        unit = 5
+    return f"{size_bytes / _SIZE_SCALES[unit]:.1f} {_SIZE_UNITS[unit]}"
+
+
 class HTMLRenderer:
     """Renders search results as HTML."""
     
@@ -15,15 +137,14 @@ class HTMLRenderer:
         Args:
             template_dir: Directory containing HTML templates
         """
-        self.template_dir = template_dir or os.path.join(
-            os.path.dirname(__file__), 'templates'
-        )
+        self.template_dir = template_dir or _DEFAULT_TEMPLATE_DIR
     
     def render_search_results(
         self, 
         results: List[SearchResult], 
         query: SearchQuery,
-        title: str = "Search Results"
+        title: str = "Search Results",
+        now: Optional[str] = None
     ) -> str:
         """Render search results as HTML.
         
@@ -31,122 +152,102 @@ class HTMLRenderer:
             results: List of search results
             query: The search query
             title: Page title
+            now: Preformatted "generated on" time (default: local time)
             
         Returns:
             Rendered HTML as string
         """
-        # Load the base template
-        base_template = self._load_template('base.html')
+        out = io.StringIO()
+        self.render_to(out, results, query, title, now)
+        return out.getvalue()
+    
+    def render_to(
+        self,
+        out: TextIO,
+        results: List[SearchResult],
+        query: SearchQuery,
+        title: str = "Search Results",
+        now: Optional[str] = None
+    ) -> None:
+        """Render search results as HTML, writing to a text stream as it goes.
         
-        # Generate results HTML
-        results_html = []
-        for result in results:
-            results_html.append(self._render_result_item(result))
+        The page head is written before any result is rendered and each
+        result is written as soon as it is built, so memory stays at one
+        result's HTML and a response can start before the page is done.
         
-        # Format the page
-        html = base_template.format(
-            title=title,
-            query=query.query_text,
+        Args:
+            out: Stream to write to (file, response body, ``io.StringIO``)
+            results: List of search results
+            query: The search query
+            title: Page title
+            now: Preformatted "generated on" time (default: local time)
+        """
+        # Load the base template, split around its {results} field
+        head, tail = _split_template(self._load_template('base.html'))
+        fields = dict(
+            title=escape(title),
+            query=escape(query.query_text),
             results_count=len(results),
-            results='\n'.join(results_html),
-            now=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            now=now or strftime('%Y-%m-%d %H:%M:%S', localtime()),
             version="0.2.0"
         )
         
-        return html
+        out.write(head.format(**fields))
+        if tail is None:
+            return
+        first = True
+        for result in results:
+            parts: List[str] = [] if first else ['\n']
+            first = False
+            self._render_result_item(result, parts)
+            out.write(''.join(parts))
+        out.write(tail.format(**fields))
     
-    def _render_result_item(self, result: SearchResult) -> str:
-        """Render a single search result item."""
-        return f"""
-        <div class="bg-white rounded-lg shadow-md p-4 mb-4">
-            <div class="flex items-center justify-between">
-                <h3 class="text-lg font-semibold text-blue-600">
-                    <a href="file://{result.file_path}" class="hover:underline">
-                        {os.path.basename(result.file_path)}
-                    </a>
-                </h3>
-                <span class="text-sm text-gray-500">
-                    {self._format_file_size(result.size)}
-                </span>
-            </div>
-            
-            <div class="mt-2 text-sm text-gray-600">
-                <p class="truncate">{result.file_path}</p>
-                <p class="mt-1">
-                    <span class="text-gray-700">Type:</span> {result.content_type}
-                    <span class="mx-2">•</span>
-                    <span class="text-gray-700">Modified:</span> {result.timestamp.strftime('%Y-%m-%d %H:%M')}
-                </p>
-            </div>
-            
-            {self._render_metadata_preview(result.metadata)}
-        </div>
-        """
+    def _render_result_item(self, result: SearchResult, out: List[str]) -> None:
+        """Append the HTML fragments of a single search result item to ``out``."""
+        # Escaping adds no path separators, so the escaped path's basename
+        # is the escaped basename
+        path = escape(result.file_path)
+        out.extend((
+            _ITEM_OPEN, path,
+            _ITEM_NAME, os.path.basename(path),
+            _ITEM_SIZE, _format_file_size(result.size),
+            _ITEM_PATH, path,
+            _ITEM_TYPE, escape(result.content_type),
+            # Same text as strftime('%Y-%m-%d %H:%M') at a third of the cost;
+            # the slice drops the UTC offset of timezone-aware timestamps
+            _ITEM_MODIFIED, result.timestamp.isoformat(' ', 'minutes')[:16],
+            _ITEM_METADATA, self._render_metadata_preview(result.metadata),
+            _ITEM_CLOSE,
+        ))
     
     def _render_metadata_preview(self, metadata: Dict[str, Any]) -> str:
-        """Render a preview of file metadata."""
+        """Render a preview of file metadata (its first eight entries)."""
         if not metadata:
             return ""
-            
+        
+        # Only the shown entries are formatted, however many tags a file has
         preview_items = []
-        for key, value in metadata.items():
+        for key, value in islice(metadata.items(), 8):
             if isinstance(value, dict):
                 value = ", ".join(f"{k}: {v}" for k, v in value.items())
-            preview_items.append(f"<strong>{key}:</strong> {value}")
-            
-        if not preview_items:
-            return ""
-            
+            preview_items.append(f"<strong>{escape(str(key))}:</strong> {escape(str(value))}")
+        
         return f"""
         <div class="mt-3 p-3 bg-gray-50 rounded text-sm">
             <h4 class="font-semibold mb-1">Metadata:</h4>
             <div class="grid grid-cols-2 gap-1">
-                {"</div><div>".join(preview_items[:8])}
+                {"</div><div>".join(preview_items)}
             </div>
         </div>
         """
     
     def _load_template(self, template_name: str) -> str:
-        """Load an HTML template."""
-        template_path = os.path.join(self.template_dir, template_name)
-        try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            # Fallback to default template
-            if template_name == 'base.html':
-                return """
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <title>{title}</title>
-                    <meta charset="UTF-8">
-                    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                    <link href="https://cdn.jsdelivr.net/npm/tailwindcss@2.2.19/dist/tailwind.min.css" rel="stylesheet">
-                </head>
-                <body class="bg-gray-100 p-8">
-                    <div class="max-w-4xl mx-auto">
-                        <h1 class="text-3xl font-bold mb-6">{title}</h1>
-                        <div class="mb-6">
-                            <p class="text-gray-600">Found {results_count} results for: <span class="font-semibold">{query}</span></p>
-                        </div>
-                        <div class="space-y-4">
-                            {results}
-                        </div>
-                        <div class="mt-8 text-center text-sm text-gray-500">
-                            <p>Generated on {now} • Qry v{version}</p>
-                        </div>
-                    </div>
-                </body>
-                </html>
-                """
-            return ""
+        """Load an HTML template (read from disk once per path, see ``_read_template``)."""
+        template = _read_template(os.path.join(self.template_dir, template_name))
+        if template is None:
+            # Fallback to the built-in default template
+            return _DEFAULT_BASE_HTML if template_name == 'base.html' else ""
+        return template
     
-    @staticmethod
-    def _format_file_size(size_bytes: int) -> str:
-        """Format file size in a human-readable format."""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.1f} PB"
+    _format_file_size = staticmethod(_format_file_size)
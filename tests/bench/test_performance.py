@@ -3,17 +3,59 @@
 Run with: pytest tests/bench/test_performance.py -v
 Or: python tests/bench/test_performance.py
 """
+import gc
+import json
 import os
+import statistics
+import subprocess
+import sys
 import tempfile
-import time
 import timeit
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 
 import qry
 from qry.engines.simple import SimpleSearchEngine
 from qry.core.models import SearchQuery
 
+try:
+    import liburing  # type: ignore
+except ImportError:  # pragma: no cover - optional benchmark dependency
+    liburing = None
+
+
+# File contents by extension, formatted with the file number
+_PAYLOADS = {
+    ".py": b"# Test file %d\ndef test_%d():\n    pass\n",
+    ".txt": b"Test content %d with some searchable text\n",
+}
+_DEFAULT_PAYLOAD = b'{"id": %d, "name": "test_%d"}\n'
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+
+
+def _write_file(
+    path: str,
+    data: bytes,
+    preallocate: bool = False,
+    dir_fd: Optional[int] = None
+) -> None:
+    """Write bytes with raw os.open/os.write, skipping Python's buffered IO.
+    
+    With ``dir_fd`` the path is resolved relative to that open directory,
+    so only the final component is looked up.
+    """
+    fd = os.open(path, _WRITE_FLAGS, 0o644, dir_fd=dir_fd)
+    try:
+        if preallocate and hasattr(os, "posix_fallocate"):
+            # Reserve the extent up front so the data is laid out in one go
+            os.posix_fallocate(fd, 0, len(data))
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
 
 def create_test_files(temp_dir: str, num_files: int = 1000) -> None:
     """Create test files for benchmarking."""
@@ -31,24 +73,61 @@ def create_test_files(temp_dir: str, num_files: int = 1000) -> None:
     for d in dirs:
         os.makedirs(os.path.join(temp_dir, d), exist_ok=True)
     
-    # Create files
+    # Create files, one directory per task; where supported, names are
+    # resolved against an open directory fd instead of the full path
     extensions = [".py", ".txt", ".md", ".json", ".yaml", ".js"]
-    for i in range(num_files):
-        subdir = dirs[i % len(dirs)]
-        ext = extensions[i % len(extensions)]
-        filename = os.path.join(temp_dir, subdir, f"file_{i}{ext}")
-        with open(filename, 'w') as f:
-            if ext == ".py":
-                f.write(f"# Test file {i}\ndef test_{i}():\n    pass\n")
-            elif ext == ".txt":
-                f.write(f"Test content {i} with some searchable text\n")
-            else:
-                f.write(f'{{"id": {i}, "name": "test_{i}"}}\n')
-    
-    # Create some large files for mmap testing
+    payloads = [_PAYLOADS.get(ext, _DEFAULT_PAYLOAD) for ext in extensions]
+    use_dir_fd = os.open in os.supports_dir_fd
+    
+    def fill_dir(k: int) -> None:
+        dir_path = os.path.join(temp_dir, dirs[k])
+        dir_fd = os.open(dir_path, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0)) if use_dir_fd else None
+        try:
+            for i in range(k, num_files, len(dirs)):
+                ext = extensions[i % len(extensions)]
+                payload = payloads[i % len(extensions)]
+                name = f"file_{i}{ext}"
+                data = payload % ((i,) * payload.count(b"%d"))
+                if dir_fd is None:
+                    _write_file(os.path.join(dir_path, name), data)
+                else:
+                    _write_file(name, data, dir_fd=dir_fd)
+        finally:
+            if dir_fd is not None:
+                os.close(dir_fd)
+    
+    # Directories exist already, so the tasks never race on makedirs; the
+    # os.* calls release the GIL and the metadata operations overlap
     large_file = os.path.join(temp_dir, "src/core/large.bin")
-    with open(large_file, 'wb') as f:
-        f.write(b'x' * (10 * 1024 * 1024))  # 10MB
+    with ThreadPoolExecutor(max_workers=min(8, len(dirs) + 1)) as pool:
+        # Create some large files for mmap testing
+        large = pool.submit(_write_file, large_file, b'x' * (10 * 1024 * 1024), True)  # 10MB
+        list(pool.map(fill_dir, range(len(dirs))))
+        large.result()
+
+
+def _bench(
+    fn: Callable[[], Any],
+    repeats: int = 7,
+    setup: Optional[Callable[[], Any]] = None
+) -> Tuple[float, float, Any]:
+    """Time fn best-of-N; return (min ms, stdev ms, fn's last return value).
+    
+    The minimum is the least noisy estimate of the code's own cost. timeit
+    switches the garbage collector off while timing, and a collection
+    beforehand starts every benchmark from the same heap state. ``setup``
+    runs untimed before each repeat (e.g. to drop caches).
+    """
+    last = [None]
+    
+    def call():
+        last[0] = fn()
+    
+    gc.collect()
+    timer = timeit.Timer(call, setup=setup or 'pass')
+    times = [t * 1000 for t in timer.repeat(repeat=repeats, number=1)]
+    stdev = statistics.stdev(times) if len(times) > 1 else 0.0
+    return min(times), stdev, last[0]
 
 
 class BenchmarkResults:
@@ -56,16 +135,44 @@ class BenchmarkResults:
     def __init__(self):
         self.results = {}
     
-    def record(self, name: str, value: float, unit: str = "ms"):
-        self.results[name] = {"value": value, "unit": unit}
+    def record(self, name: str, value: float, unit: str = "ms", stdev: Optional[float] = None):
+        self.results[name] = {"value": value, "unit": unit, "stdev": stdev}
     
     def display(self):
         print("\n" + "="*60)
         print("BENCHMARK RESULTS")
         print("="*60)
         for name, data in sorted(self.results.items()):
-            print(f"{name:40} {data['value']:10.2f} {data['unit']}")
+            spread = f" ± {data['stdev']:.2f}" if data.get('stdev') else ""
+            print(f"{name:40} {data['value']:10.2f} {data['unit']}{spread}")
         print("="*60)
+    
+    def dump(self, path: str) -> None:
+        """Write the results as JSON so runs can be diffed over time."""
+        payload = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_sha": _git_sha(),
+            "python_version": sys.version,
+            "results": [
+                {"name": name, **data}
+                for name, data in sorted(self.results.items())
+            ],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+
+
+def _git_sha() -> str:
+    """Short SHA of the checkout being benchmarked, or 'unknown'."""
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return out.stdout.strip() or "unknown"
 
 
 def benchmark_filename_search(temp_dir: str) -> BenchmarkResults:
@@ -73,24 +180,20 @@ def benchmark_filename_search(temp_dir: str) -> BenchmarkResults:
     results = BenchmarkResults()
     
     # Test 1: Basic filename search
-    start = time.perf_counter()
-    files = qry.search("file_", scope=temp_dir, mode="filename")
-    elapsed = (time.perf_counter() - start) * 1000
-    results.record("filename_search_1k_files", elapsed, "ms")
+    elapsed, stdev, files = _bench(lambda: qry.search("file_", scope=temp_dir, mode="filename"))
+    results.record("filename_search_1k_files", elapsed, "ms", stdev)
     print(f"Filename search (1k files): {elapsed:.2f}ms, found {len(files)}")
     
     # Test 2: With depth limit
-    start = time.perf_counter()
-    files = qry.search("file_", scope=temp_dir, mode="filename", depth=1)
-    elapsed = (time.perf_counter() - start) * 1000
-    results.record("filename_search_depth_1", elapsed, "ms")
+    elapsed, stdev, files = _bench(lambda: qry.search("file_", scope=temp_dir, mode="filename", depth=1))
+    results.record("filename_search_depth_1", elapsed, "ms", stdev)
     print(f"Filename search (depth=1): {elapsed:.2f}ms, found {len(files)}")
     
     # Test 3: With file type filter
-    start = time.perf_counter()
-    files = qry.search("file_", scope=temp_dir, mode="filename", file_types=["py"])
-    elapsed = (time.perf_counter() - start) * 1000
-    results.record("filename_search_py_only", elapsed, "ms")
+    elapsed, stdev, files = _bench(
+        lambda: qry.search("file_", scope=temp_dir, mode="filename", file_types=["py"])
+    )
+    results.record("filename_search_py_only", elapsed, "ms", stdev)
     print(f"Filename search (.py only): {elapsed:.2f}ms, found {len(files)}")
     
     return results
@@ -111,50 +214,88 @@ def benchmark_date_filtering(temp_dir: str) -> BenchmarkResults:
         max_results=10000,
     )
     
-    engine = SimpleSearchEngine(max_workers=1, use_cache=True)
+    engine = SimpleSearchEngine(max_workers=1)
     
-    start = time.perf_counter()
-    search_results = engine.search(query, [temp_dir])
-    elapsed = (time.perf_counter() - start) * 1000
-    results.record("date_filter_7_days", elapsed, "ms")
+    elapsed, stdev, search_results = _bench(lambda: engine.search(query, [temp_dir]))
+    results.record("date_filter_7_days", elapsed, "ms", stdev)
     print(f"Date filtering (7 days): {elapsed:.2f}ms, found {len(search_results)}")
     
     return results
 
 
+def _drop_pagecache(root: str) -> None:
+    """Evict the file data under root from the OS page cache.
+    
+    Dirty pages cannot be dropped, so each file is synced first. Only file
+    contents are evicted; directory entries and inodes stay cached.
+    """
+    for dirpath, _dirs, names in os.walk(root):
+        for name in names:
+            fd = os.open(os.path.join(dirpath, name), os.O_RDONLY)
+            try:
+                os.fdatasync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def _clear_app_caches() -> None:
+    """Clear the search engine's process-wide memo caches."""
+    from qry.engines import fast_search, simple
+    for module in (simple, fast_search):
+        for obj in vars(module).values():
+            if hasattr(obj, 'cache_clear'):
+                obj.cache_clear()
+    SimpleSearchEngine._parse_dir_date.cache_clear()
+
+
 def benchmark_caching(temp_dir: str) -> BenchmarkResults:
-    """Benchmark caching effectiveness."""
+    """Benchmark the OS page cache and the engine's own caches separately.
+    
+    A content search reads file data, so it is timed three ways: with the
+    tree's pages evicted and a fresh engine (cold OS, cold app), with warm
+    pages and a fresh engine (warm OS, cold app), and with warm pages and a
+    reused engine (warm OS, warm app). Eviction needs posix_fadvise, so the
+    first measurement is skipped where it is unavailable.
+    """
     results = BenchmarkResults()
     
-    # Import the cached function directly
-    from qry.engines.simple import _cached_stat
-    
-    engine = SimpleSearchEngine(max_workers=1, use_cache=True)
     query = SearchQuery(
-        query_text="file_",
+        query_text="searchable",
         file_types=[],
         max_results=10000,
+        search_mode="content",
     )
     
-    # First run (cold cache)
-    _cached_stat.cache_clear()  # Clear cache
-    start = time.perf_counter()
-    engine.search(query, [temp_dir])
-    cold_time = (time.perf_counter() - start) * 1000
-    results.record("search_cold_cache", cold_time, "ms")
-    print(f"Search (cold cache): {cold_time:.2f}ms")
+    def fresh_engine_search():
+        return SimpleSearchEngine(max_workers=1).search(query, [temp_dir])
     
-    # Second run (warm cache)
-    start = time.perf_counter()
+    cold_os_time = None
+    if hasattr(os, 'posix_fadvise'):
+        def drop_all():
+            _drop_pagecache(temp_dir)
+            _clear_app_caches()
+        
+        cold_os_time, stdev, _found = _bench(fresh_engine_search, setup=drop_all)
+        results.record("search_cold_os_cold_app", cold_os_time, "ms", stdev)
+        print(f"Search (cold OS, cold app cache): {cold_os_time:.2f}ms")
+    
+    cold_app_time, stdev, _found = _bench(fresh_engine_search, setup=_clear_app_caches)
+    results.record("search_warm_os_cold_app", cold_app_time, "ms", stdev)
+    print(f"Search (warm OS, cold app cache): {cold_app_time:.2f}ms")
+    
+    engine = SimpleSearchEngine(max_workers=1)
     engine.search(query, [temp_dir])
-    warm_time = (time.perf_counter() - start) * 1000
-    results.record("search_warm_cache", warm_time, "ms")
-    print(f"Search (warm cache): {warm_time:.2f}ms")
+    warm_time, stdev, _found = _bench(lambda: engine.search(query, [temp_dir]))
+    results.record("search_warm_os_warm_app", warm_time, "ms", stdev)
+    print(f"Search (warm OS, warm app cache): {warm_time:.2f}ms")
     
-    if cold_time > 0:
-        speedup = cold_time / warm_time if warm_time > 0 else 1
-        results.record("cache_speedup", speedup, "x")
-        print(f"Cache speedup: {speedup:.2f}x")
+    if cold_os_time and cold_app_time > 0:
+        results.record("page_cache_speedup", cold_os_time / cold_app_time, "x")
+        print(f"Page cache speedup: {cold_os_time / cold_app_time:.2f}x")
+    if warm_time > 0:
+        results.record("app_cache_speedup", cold_app_time / warm_time, "x")
+        print(f"App cache speedup: {cold_app_time / warm_time:.2f}x")
     
     return results
 
@@ -170,19 +311,15 @@ def benchmark_parallel_search(temp_dir: str) -> BenchmarkResults:
     )
     
     # Sequential
-    engine_seq = SimpleSearchEngine(max_workers=1, use_cache=False)
-    start = time.perf_counter()
-    engine_seq.search(query, [temp_dir])
-    seq_time = (time.perf_counter() - start) * 1000
-    results.record("search_sequential", seq_time, "ms")
+    engine_seq = SimpleSearchEngine(max_workers=1)
+    seq_time, stdev, _found = _bench(lambda: engine_seq.search(query, [temp_dir]))
+    results.record("search_sequential", seq_time, "ms", stdev)
     print(f"Sequential search: {seq_time:.2f}ms")
     
     # Parallel (4 workers)
-    engine_par = SimpleSearchEngine(max_workers=4, use_cache=False)
-    start = time.perf_counter()
-    engine_par.search(query, [temp_dir])
-    par_time = (time.perf_counter() - start) * 1000
-    results.record("search_parallel_4w", par_time, "ms")
+    engine_par = SimpleSearchEngine(max_workers=4)
+    par_time, stdev, _found = _bench(lambda: engine_par.search(query, [temp_dir]))
+    results.record("search_parallel_4w", par_time, "ms", stdev)
     print(f"Parallel search (4w): {par_time:.2f}ms")
     
     if seq_time > 0:
@@ -194,30 +331,58 @@ def benchmark_parallel_search(temp_dir: str) -> BenchmarkResults:
 
 
 def benchmark_large_file_mmap(temp_dir: str) -> BenchmarkResults:
-    """Benchmark mmap vs regular file reading."""
+    """Benchmark mmap vs regular file reading vs chunked pread."""
     results = BenchmarkResults()
     
     large_file = os.path.join(temp_dir, "src/core/large.bin")
     
     # Regular read
-    start = time.perf_counter()
-    with open(large_file, 'rb') as f:
-        data = f.read()
-        found = b'test' in data
-    read_time = (time.perf_counter() - start) * 1000
-    results.record("file_read_10MB", read_time, "ms")
+    def regular_read():
+        with open(large_file, 'rb') as f:
+            data = f.read()
+            return b'test' in data
+    
+    read_time, stdev, _found = _bench(regular_read)
+    results.record("file_read_10MB", read_time, "ms", stdev)
     print(f"Regular read (10MB): {read_time:.2f}ms")
     
-    # mmap read
+    # mmap read, telling the kernel to read ahead for a front-to-back scan
     import mmap
-    start = time.perf_counter()
-    with open(large_file, 'rb') as f:
-        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
-            pos = mm.find(b'test')
-    mmap_time = (time.perf_counter() - start) * 1000
-    results.record("mmap_read_10MB", mmap_time, "ms")
+    
+    def mmap_read():
+        with open(large_file, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                return mm.find(b'test')
+    
+    mmap_time, stdev, _pos = _bench(mmap_read)
+    results.record("mmap_read_10MB", mmap_time, "ms", stdev)
     print(f"MMAP read (10MB): {mmap_time:.2f}ms")
     
+    # pread in 1 MB chunks; the previous chunk's tail catches matches across a boundary
+    if hasattr(os, 'pread'):
+        chunk_size = 1 << 20
+        
+        def pread_read():
+            fd = os.open(large_file, os.O_RDONLY)
+            try:
+                offset, tail, found = 0, b'', False
+                while not found:
+                    chunk = os.pread(fd, chunk_size, offset)
+                    if not chunk:
+                        break
+                    found = b'test' in chunk or b'test' in tail + chunk[:3]
+                    tail = chunk[-3:]
+                    offset += len(chunk)
+                return found
+            finally:
+                os.close(fd)
+        
+        pread_time, stdev, _found = _bench(pread_read)
+        results.record("pread_read_10MB", pread_time, "ms", stdev)
+        print(f"pread read (10MB): {pread_time:.2f}ms")
+    
     if read_time > 0:
         speedup = read_time / mmap_time if mmap_time > 0 else 1
         results.record("mmap_speedup", speedup, "x")
@@ -226,24 +391,97 @@ def benchmark_large_file_mmap(temp_dir: str) -> BenchmarkResults:
     return results
 
 
+def benchmark_iouring_scan(temp_dir: str, header_size: int = 64, batch_size: int = 64) -> BenchmarkResults:
+    """Benchmark reading every file's header with batched io_uring reads.
+    
+    The sequential baseline does one open/read/close per file; the io_uring
+    variant still opens each file but submits the reads of a whole batch
+    with a single syscall. Skipped unless running on Linux with liburing.
+    """
+    results = BenchmarkResults()
+    if liburing is None or not sys.platform.startswith('linux'):
+        print("io_uring scan: skipped (needs Linux and liburing)")
+        return results
+    
+    paths = [
+        os.path.join(dirpath, name)
+        for dirpath, _dirs, names in os.walk(temp_dir)
+        for name in names
+    ]
+    
+    # Sequential: one blocking read per file
+    def sequential_scan():
+        total = 0
+        for path in paths:
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                total += len(os.read(fd, header_size))
+            finally:
+                os.close(fd)
+        return total
+    
+    seq_time, seq_stdev, seq_bytes = _bench(sequential_scan)
+    results.record("header_scan_sequential", seq_time, "ms", seq_stdev)
+    print(f"Header scan (sequential, {len(paths)} files): {seq_time:.2f}ms")
+    
+    # io_uring: one submit per batch of reads
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    
+    def uring_scan():
+        total = 0
+        for b in range(0, len(paths), batch_size):
+            fds = [os.open(path, os.O_RDONLY) for path in paths[b:b + batch_size]]
+            try:
+                buffers = [bytearray(header_size) for _ in fds]
+                for fd, buf in zip(fds, buffers):
+                    sqe = liburing.io_uring_get_sqe(ring)
+                    liburing.io_uring_prep_read(sqe, fd, buf, 0)
+                liburing.io_uring_submit_and_wait(ring, len(fds))
+                # All reads have completed; reap them (only cqe[0] is reliable)
+                for _ in fds:
+                    liburing.io_uring_wait_cqe(ring, cqe)
+                    total += max(cqe[0].res, 0)
+                    liburing.io_uring_cqe_seen(ring, cqe[0])
+            finally:
+                for fd in fds:
+                    os.close(fd)
+        return total
+    
+    liburing.io_uring_queue_init(batch_size, ring)
+    try:
+        uring_time, uring_stdev, uring_bytes = _bench(uring_scan)
+    finally:
+        liburing.io_uring_queue_exit(ring)
+    results.record("header_scan_iouring", uring_time, "ms", uring_stdev)
+    print(f"Header scan (io_uring, batches of {batch_size}): {uring_time:.2f}ms")
+    assert uring_bytes == seq_bytes
+    
+    if uring_time > 0:
+        results.record("iouring_speedup", seq_time / uring_time, "x")
+        print(f"io_uring speedup: {seq_time / uring_time:.2f}x")
+    
+    return results
+
+
 def benchmark_iter_vs_list(temp_dir: str) -> BenchmarkResults:
     """Benchmark iterator vs list return."""
     results = BenchmarkResults()
     
     # List return
-    start = time.perf_counter()
-    files = qry.search("file_", scope=temp_dir, mode="filename")
-    list_time = (time.perf_counter() - start) * 1000
-    results.record("search_list_return", list_time, "ms")
+    list_time, stdev, files = _bench(lambda: qry.search("file_", scope=temp_dir, mode="filename"))
+    results.record("search_list_return", list_time, "ms", stdev)
     print(f"Search (list return): {list_time:.2f}ms, {len(files)} files")
     
     # Iterator return  
-    start = time.perf_counter()
-    count = 0
-    for f in qry.search_iter("file_", scope=temp_dir, mode="filename"):
-        count += 1
-    iter_time = (time.perf_counter() - start) * 1000
-    results.record("search_iter_return", iter_time, "ms")
+    def consume_iter():
+        count = 0
+        for f in qry.search_iter("file_", scope=temp_dir, mode="filename"):
+            count += 1
+        return count
+    
+    iter_time, stdev, count = _bench(consume_iter)
+    results.record("search_iter_return", iter_time, "ms", stdev)
     print(f"Search (iter return): {iter_time:.2f}ms, {count} files")
     
     return results
@@ -277,11 +515,18 @@ def run_all_benchmarks():
         print("\n--- Large File (mmap) ---")
         all_results.results.update(benchmark_large_file_mmap(temp_dir).results)
         
+        print("\n--- Header Scan (io_uring) ---")
+        all_results.results.update(benchmark_iouring_scan(temp_dir).results)
+        
         print("\n--- Iterator vs List ---")
         all_results.results.update(benchmark_iter_vs_list(temp_dir).results)
         
         all_results.display()
         
+        out_path = Path(__file__).parent / f"results-{_git_sha()}.json"
+        all_results.dump(str(out_path))
+        print(f"Results written to {out_path}")
+        
         return all_results
 
 
@@ -101,6 +101,54 @@ class TestSearch:
         results = qry.search(r"def \w+\(\)", scope=str(sample_tree), mode="content", regex=True)
         assert any("hello.py" in r for r in results)
 
+    def test_regex_content_backreference(self, sample_tree):
+        import qry
+        # Back-references are not supported by every regex backend
+        results = qry.search(r"(\w)\1", scope=str(sample_tree), mode="content", regex=True)
+        names = sorted(os.path.basename(r) for r in results)
+        assert names == ["deep.txt", "hello.py"]
+
+    def test_regex_content_crlf_anchors(self, tmp_path):
+        import qry
+        (tmp_path / "crlf.txt").write_bytes(b"hello\r\nworld\r\n")
+        (tmp_path / "cr.txt").write_bytes(b"hello\rworld\r")
+        (tmp_path / "lf.txt").write_bytes(b"hello\nworld\n")
+        results = qry.search(r"^world$", scope=str(tmp_path), mode="content", regex=True)
+        names = sorted(os.path.basename(r) for r in results)
+        assert names == ["cr.txt", "crlf.txt", "lf.txt"]
+
+    @pytest.mark.filterwarnings("ignore:Possible nested set:FutureWarning")
+    @pytest.mark.parametrize("pattern, expected", [
+        (r"x{,2}hello", ["one.txt", "two.txt"]),
+        (r"[[:alpha:]]+", []),
+        (r"there\Z", []),
+        (r"^end\Z", []),
+    ])
+    def test_regex_content_python_syntax(self, tmp_path, pattern, expected):
+        import qry
+        # Python re semantics, whichever scanner (re or hyperscan) runs
+        (tmp_path / "one.txt").write_text("hello there\n")
+        (tmp_path / "two.txt").write_text("say hello\nend\n")
+        results = qry.search(pattern, scope=str(tmp_path), mode="content", regex=True)
+        assert sorted(os.path.basename(r) for r in results) == expected
+
+    def test_regex_content_single_line(self, tmp_path):
+        import qry
+        from qry.engines.simple import SimpleSearchEngine
+        (tmp_path / "split.txt").write_text("say hello\nend\n")
+        (tmp_path / "later.txt").write_text("say hello\n end, hello end\n")
+        results = qry.search(r"hello\s+end", scope=str(tmp_path), mode="content", regex=True)
+        assert [os.path.basename(r) for r in results] == ["later.txt"]
+        # Every match has a snippet
+        assert SimpleSearchEngine.get_content_snippet(results[0], r"hello\s+end", use_regex=True)
+
+    def test_regex_content_str_only_escapes(self, sample_tree):
+        import qry
+        # Valid for str patterns only; must not degrade to a literal search
+        for pattern in (r"\U00000068ello", r"\N{LATIN SMALL LETTER H}ello"):
+            results = qry.search(pattern, scope=str(sample_tree), mode="content", regex=True)
+            assert [os.path.basename(r) for r in results] == ["hello.py"]
+
     def test_sort_by_name(self, sample_tree):
         import qry
         results = qry.search("", scope=str(sample_tree), sort_by="name")
@@ -125,6 +173,18 @@ class TestSearch:
         assert "hello.py" in names
         assert "readme.md" in names
 
+    def test_or_query_many_terms(self, sample_tree):
+        import qry
+        results = qry.search("hello or README or deep or missing", scope=str(sample_tree))
+        names = sorted(os.path.basename(r) for r in results)
+        assert names == ["deep.txt", "hello.py", "readme.md"]
+
+    def test_content_or_many_terms(self, sample_tree):
+        import qry
+        results = qry.search("KEYWORD or docs or missing or absent", scope=str(sample_tree), mode="content")
+        names = sorted(os.path.basename(r) for r in results)
+        assert names == ["deep.txt", "readme.md"]
+
 
 # ---------------------------------------------------------------------------
 # Engine internals
@@ -154,6 +214,183 @@ class TestSimpleEngine:
         )
         assert snippet is None
 
+    def test_directory_priority(self):
+        from qry.engines.simple import Priority, _get_directory_priority
+        assert _get_directory_priority("src") == Priority.SOURCE
+        assert _get_directory_priority("build/src") == Priority.SOURCE
+        assert _get_directory_priority("pkg/node_modules/x") == Priority.CACHE
+        assert _get_directory_priority(".git/objects") == Priority.EXCLUDED
+        assert _get_directory_priority("agit") == Priority.MAIN
+        assert _get_directory_priority("anything/else") == Priority.MAIN
+
+    def test_descend_priority_matches_full_path(self):
+        from qry.engines.simple import Priority, _descend_priority, _get_directory_priority
+        for rel in ("src", "build/src", "pkg/node_modules/x", "a/tmp/tests", "cache/.git", "x/y"):
+            matched = None
+            for name in rel.split("/"):
+                matched = _descend_priority(matched, name)
+            folded = Priority.MAIN if matched is None else matched
+            assert folded == _get_directory_priority(rel)
+
+    def test_priority_mode_order(self, tmp_path):
+        from qry.core.models import SearchQuery
+        from qry.engines.simple import SimpleSearchEngine
+        (tmp_path / "root.txt").write_text("root")
+        for name in ("cache", "misc", "src", "misc/src"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / f"{name.replace('/', '_')}.txt").write_text(name)
+        calls = []
+        engine = SimpleSearchEngine(
+            priority_mode=True,
+            priority_callback=lambda *args: calls.append(args),
+        )
+        results = engine.search(SearchQuery(query_text="", exclude_dirs=[]), [str(tmp_path)])
+        names = [os.path.basename(r.file_path) for r in results]
+        # Root files first, then the highest-priority directory known at each
+        # step: misc/src is found inside misc and outranks the queued cache
+        assert names == ["root.txt", "src.txt", "misc.txt", "misc_src.txt", "cache.txt"]
+        # One call per run of same-priority directories, covering every result
+        assert [c[0] for c in calls] == ["MAIN", "SOURCE", "MAIN", "SOURCE", "CACHE"]
+        assert [c[1] for c in calls] == list(range(1, len(calls) + 1))
+        assert all(total >= current for _, current, total, _ in calls)
+        assert calls[-1][2] == len(calls)
+        assert [p for c in calls for p in c[3]] == [r.file_path for r in results]
+
+    def test_parallel_multiple_roots(self, sample_tree):
+        from datetime import datetime, timedelta
+        from qry.core.models import SearchQuery
+        from qry.engines.simple import SimpleSearchEngine
+        now = datetime.now()
+        query = SearchQuery(query_text="", date_range=(now - timedelta(days=1), now + timedelta(days=1)))
+        roots = [str(sample_tree), str(sample_tree / "sub")]
+        sequential = SimpleSearchEngine(max_workers=1).search(query, roots)
+        parallel = SimpleSearchEngine(max_workers=2).search(query, roots)
+        assert sorted(r.file_path for r in parallel) == sorted(r.file_path for r in sequential)
+        assert any(r.file_path.endswith("deep.txt") for r in parallel)
+
+    @pytest.mark.parametrize("use_processes", [False, True])
+    def test_multiple_roots_from_unguarded_script(self, tmp_path, use_processes):
+        import subprocess
+        import sys
+        for name in ("a", "b"):
+            (tmp_path / name).mkdir()
+            (tmp_path / name / f"{name}.txt").write_text(name)
+        # No __main__ guard: worker processes re-import this script
+        script = tmp_path / "unguarded.py"
+        script.write_text(textwrap.dedent(f"""
+            import os
+            from datetime import datetime, timedelta
+            from qry.core.models import SearchQuery
+            from qry.engines.simple import SimpleSearchEngine
+            now = datetime.now()
+            query = SearchQuery(query_text="", date_range=(now - timedelta(days=1), now + timedelta(days=1)))
+            engine = SimpleSearchEngine(max_workers=2, use_processes={use_processes})
+            results = engine.search(query, [{str(tmp_path / "a")!r}, {str(tmp_path / "b")!r}])
+            print(sorted(os.path.basename(r.file_path) for r in results))
+        """))
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+        proc = subprocess.run(
+            [sys.executable, str(script)], capture_output=True, text=True, env=env, timeout=60
+        )
+        assert proc.returncode == 0
+        assert proc.stdout.strip().splitlines()[-1] == "['a.txt', 'b.txt']"
+
+    def test_content_scan_starts_no_processes_by_default(self, tmp_path):
+        import subprocess
+        import sys
+        data = tmp_path / "data"
+        data.mkdir()
+        (data / "a.txt").write_text("needle\n")
+        (data / "b.txt").write_text("hay\n")
+        # Unguarded script whose top level would re-run in a worker process
+        script = tmp_path / "unguarded.py"
+        script.write_text(textwrap.dedent(f"""
+            import os
+            from datetime import datetime, timedelta
+            import qry.engines.simple as simple
+            from qry.core.models import SearchQuery
+            print("side effect")
+            simple.hyperscan = None
+            simple._CONTENT_PROCESS_MIN_SIZE = 0
+            now = datetime.now()
+            query = SearchQuery(query_text="needle", search_mode="content",
+                                date_range=(now - timedelta(days=1), now + timedelta(days=1)))
+            results = simple.SimpleSearchEngine(max_workers=2).search(query, [{str(data)!r}])
+            print(sorted(os.path.basename(r.file_path) for r in results))
+        """))
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, PYTHONPATH=root)
+        proc = subprocess.run(
+            [sys.executable, str(script)], capture_output=True, text=True, env=env, timeout=60
+        )
+        assert proc.returncode == 0
+        assert proc.stdout.splitlines() == ["side effect", "['a.txt']"]
+
+    def test_parallel_interleaved_searches(self, sample_tree):
+        import threading
+        from datetime import datetime, timedelta
+        from qry.core.models import SearchQuery
+        from qry.engines.simple import SimpleSearchEngine
+        now = datetime.now()
+        query = SearchQuery(query_text="", date_range=(now - timedelta(days=1), now + timedelta(days=1)))
+        engine = SimpleSearchEngine(max_workers=2)
+        expected = sorted(r.file_path for r in engine.search(query, [str(sample_tree)]))
+        first = engine.search_iter(query, [str(sample_tree)])
+        next(first)
+        # A partly consumed search must not block the next one on the same engine
+        second = []
+        t = threading.Thread(
+            target=lambda: second.extend(engine.search_iter(query, [str(sample_tree)])), daemon=True
+        )
+        t.start()
+        t.join(timeout=10)
+        assert not t.is_alive()
+        assert sorted(r.file_path for r in second) == expected
+        first.close()
+
+    def test_concurrent_searches_keep_their_date_ranges(self, tmp_path):
+        from datetime import datetime, timedelta
+        from qry.core.models import SearchQuery
+        from qry.engines.simple import SimpleSearchEngine
+        for i in range(40):
+            (tmp_path / f"a{i}" / "2020-01-01").mkdir(parents=True)
+            (tmp_path / f"a{i}" / "top.txt").write_text("x")
+            (tmp_path / f"a{i}" / "2020-01-01" / "old.txt").write_text("x")
+        now = datetime.now()
+        # Dated directories outside the range are pruned, whatever their files' mtimes
+        recent = SearchQuery(query_text="", date_range=(now - timedelta(days=1), now + timedelta(days=1)))
+        wide = SearchQuery(query_text="", date_range=(datetime(2019, 1, 1), now + timedelta(days=1)))
+        engine = SimpleSearchEngine(max_workers=2)
+        first = engine.search_iter(recent, [str(tmp_path)])
+        names = [os.path.basename(next(first).file_path)]
+        assert len(engine.search(wide, [str(tmp_path)])) == 80
+        names.extend(os.path.basename(r.file_path) for r in first)
+        assert names == ["top.txt"] * 40
+
+    def test_compile_query(self):
+        from qry.core.models import SearchQuery
+        from qry.engines.simple import _compile_query
+        compiled = _compile_query(SearchQuery(query_text="Foo or BAR", file_types=["py", "md"], search_mode="both"))
+        assert compiled.patterns == ("foo", "bar")
+        assert compiled.needles == (b"foo", b"bar")
+        assert compiled.file_suffixes == frozenset({".py", ".md"})
+        assert compiled.match_content and not compiled.match_filename
+        compiled = _compile_query(SearchQuery(query_text="foo", search_mode="unknown"))
+        assert compiled.match_filename and not compiled.match_content
+
+    def test_parse_dir_date(self):
+        from datetime import datetime
+        from qry.engines.simple import SimpleSearchEngine
+        parse = SimpleSearchEngine._parse_dir_date
+        assert parse("2024-03-15") == datetime(2024, 3, 15)
+        assert parse("20240315") == datetime(2024, 3, 15)
+        assert parse("202403") == datetime(2024, 3, 1)
+        assert parse("15-03-2024") == datetime(2024, 3, 15)
+        assert parse("March_2024") == datetime(2024, 3, 1)
+        assert parse("backup_2024") == datetime(2024, 1, 1)
+        assert parse("logs") is None
+
 
 # ---------------------------------------------------------------------------
 # CLI helpers
@@ -179,3 +416,48 @@ class TestParseSize:
         from qry.cli.commands import _parse_size
         assert _parse_size("1G") == 1024 ** 3
         assert _parse_size("2gb") == 2 * 1024 ** 3
+
+
+# ---------------------------------------------------------------------------
+# HTML rendering
+# ---------------------------------------------------------------------------
+
+class TestHTMLRenderer:
+    def test_render_to_stream(self, sample_tree):
+        import io
+        from qry.core.models import SearchQuery
+        from qry.engines.simple import SimpleSearchEngine
+        from qry.web.renderer import HTMLRenderer
+        query = SearchQuery(query_text="")
+        results = SimpleSearchEngine().search(query, [str(sample_tree)])
+        out = io.StringIO()
+        HTMLRenderer().render_to(out, results, query, now="2024-01-02 03:04:05")
+        html = out.getvalue()
+        assert f"Found {len(results)} results" in html
+        assert "Generated on 2024-01-02 03:04:05" in html
+        assert html.count('class="bg-white rounded-lg') == len(results)
+        assert html.rstrip().endswith("</html>")
+
+    def test_render_escapes_user_text(self):
+        from datetime import datetime
+        from qry.core.models import SearchQuery, SearchResult
+        from qry.web.renderer import HTMLRenderer
+        result = SearchResult(
+            file_path='/tmp/<b>&"x".py', file_type='.py', content_type='text/x-python', data={},
+            metadata={'note': '<i>'}, timestamp=datetime(2024, 1, 2, 3, 4), size=10,
+        )
+        html = HTMLRenderer().render_search_results([result], SearchQuery(query_text="<script>"))
+        assert "<script>" not in html and "&lt;script&gt;" in html
+        assert "<b>" not in html and "&lt;b&gt;&amp;&quot;x&quot;.py" in html
+        assert "<i>" not in html
+        assert "2024-01-02 03:04" in html
+
+    def test_format_file_size(self):
+        from qry.web.renderer import HTMLRenderer
+        fmt = HTMLRenderer._format_file_size
+        assert fmt(0) == "0.0 B"
+        assert fmt(1023) == "1023.0 B"
+        assert fmt(1536) == "1.5 KB"
+        assert fmt(5 * 1024 ** 3) == "5.0 GB"
+        assert fmt(1536.0) == "1.5 KB"
+        assert fmt(0.5) == "0.5 B"